@@ -10,12 +10,56 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite+aiosqlite:///./data/app.db"
+    database_read_url: str = ""  # optional separate engine for read-only queries
+    
+    # Database tuning (connection pool and SQLite PRAGMAs)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 20000
+    sqlite_mmap_size: int = 268435456  # 256 MB
+    
+    # Usage ingestion (write-behind buffer)
+    usage_flush_max_events: int = 500
+    usage_flush_interval_seconds: float = 1.0
+    usage_flush_max_retries: int = 8
+    usage_flush_retry_backoff_seconds: float = 0.5
+    usage_rate_half_life_hours: float = 6.0
+    usage_events_max_batch: int = 1000
+    usage_idempotency_ttl_seconds: float = 86400.0
+    usage_idempotency_max_keys: int = 100000
+    
+    # Live quota stream (server-sent events)
+    quota_stream_keepalive_seconds: float = 15.0
+    quota_stream_min_interval_seconds: float = 0.5
     
     # Security
     jwt_secret: str = "your-secret-key-change-in-production"
     jwt_algorithm: str = "HS256"
     jwt_expiration_hours: int = 24
     encryption_key: str = "your-encryption-key-change-in-production"
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32
+    password_hash_queue_timeout_seconds: float = 5.0
+    auth_cache_ttl_seconds: float = 60.0
+    auth_cache_max_entries: int = 10000
+    
+    # Outbound HTTP (shared client for platform APIs and Telegram)
+    http_timeout_seconds: float = 10.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_per_host_concurrency: int = 10
+    http_max_retries: int = 2
+    http_retry_backoff_seconds: float = 0.5
+    
+    # Account verification (platform API probes)
+    verify_max_concurrency: int = 10
+    verify_cache_ttl_seconds: float = 300.0
+    platform_api_base_urls: dict = {}  # platform_id -> base URL override
     
     # Telegram
     telegram_bot_token: str = ""
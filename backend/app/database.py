@@ -1,14 +1,54 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
 
 Base = declarative_base()
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-    future=True
-)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite tuning profile to each new connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def build_engine(database_url: str) -> AsyncEngine:
+    """Create an async engine with pooling and, for SQLite, the tuning PRAGMAs"""
+    url = make_url(database_url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and url.database in (None, "", ":memory:")
+    
+    options = {"echo": False, "future": True}
+    if not in_memory:
+        # aiosqlite would otherwise open a new connection for every session
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_pre_ping=not is_sqlite
+        )
+    
+    new_engine = create_async_engine(database_url, **options)
+    if is_sqlite:
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+
+engine = build_engine(settings.database_url)
+
+# Read-only queries can be pointed at their own engine (e.g. a replica, or a
+# second SQLite pool opened with "?mode=ro&uri=true"); by default they share
+# the main engine.
+read_engine = build_engine(settings.database_read_url) if settings.database_read_url else engine
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -16,6 +56,12 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+read_session_maker = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 
 async def get_db():
     """Dependency for getting database session"""
@@ -26,7 +72,23 @@ async def get_db():
             await session.close()
 
 
-async def init_db():
-    """Initialize database tables"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+if read_engine is engine:
+    # With one engine, get_read_db is get_db itself. FastAPI caches a
+    # dependency per request, so an endpoint and get_current_user share one
+    # session whichever of the two each depends on.
+    get_read_db = get_db
+else:
+    async def get_read_db():
+        """Dependency for getting a database session for read-only queries"""
+        async with read_session_maker() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
+
+
+async def close_db():
+    """Dispose of the database connection pools"""
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
@@ -3,18 +3,34 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.database import init_db
-from app.routers import auth, accounts, quota, guides
+from app.database import close_db
+from app.migrations import upgrade_database
+from app.routers import auth, accounts, quota, guides, routing, usage
+from app.services.http_client import http_client
+from app.services.password_hasher import password_hasher
+from app.services.recommendation_engine import recommendation_engine
+from app.services.usage_buffer import usage_buffer
+from app.services.usage_rate import usage_rate_estimator
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle manager for startup and shutdown"""
     # Startup
-    await init_db()
-    print("Database initialized")
+    schema_version = await upgrade_database()
+    print(f"Database initialized (schema version {schema_version})")
+    await usage_rate_estimator.warm_up()
+    http_client.start()
+    password_hasher.start()
+    usage_buffer.start()
+    recommendation_engine.start()
     yield
     # Shutdown
+    await usage_buffer.stop()
+    await recommendation_engine.stop()
+    await close_db()
+    await http_client.stop()
+    password_hasher.shutdown()
     print("Application shutting down")
 
 
@@ -38,6 +54,8 @@ app.include_router(auth.router)
 app.include_router(accounts.router)
 app.include_router(quota.router)
 app.include_router(guides.router)
+app.include_router(routing.router)
+app.include_router(usage.router)
 
 
 @app.get("/")
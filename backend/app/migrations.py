@@ -0,0 +1,174 @@
+"""
+Versioned schema migrations.
+
+A fresh database is created from the models and stamped with the latest
+version. An existing database is upgraded in place by running every
+migration newer than its recorded version. At startup, an up-to-date
+database only costs a single version query.
+
+A migration may use several transactions (e.g. batched backfills), and its
+version is only recorded once it has finished, so a migration interrupted
+by a crash runs again from the start on the next boot. Every step must
+therefore be safe to re-run: use _add_column_if_missing, CREATE ... IF NOT
+EXISTS, and backfills that only select rows still needing work.
+
+Databases created before versioning (tables but no schema_version table)
+are treated as version 1, the original schema.
+"""
+from datetime import datetime
+from typing import Awaitable, Callable, List, Tuple
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+import asyncio
+
+from app.database import Base, engine
+from app.services.encryption import encryption_service
+# Register every model table on Base.metadata
+from app.models import platform_account, quota, usage_log, user  # noqa: F401
+
+schema_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    schema_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow, nullable=False),
+)
+
+Migration = Tuple[int, str, Callable[[AsyncEngine], Awaitable[None]]]
+
+
+async def _add_column_if_missing(db_engine: AsyncEngine, table: str, column: str, column_type: str):
+    """ALTER TABLE ... ADD COLUMN, skipped if an earlier interrupted run already added it"""
+    async with db_engine.begin() as conn:
+        columns = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_columns(table))
+        if any(existing["name"] == column for existing in columns):
+            return
+        await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+
+
+async def _create_indexes(db_engine: AsyncEngine, statements: List[str]):
+    """
+    Build indexes one per transaction.
+    
+    SQLite blocks writers while an index is built, so each index gets its own
+    short transaction and writers can get in between them.
+    """
+    for statement in statements:
+        async with db_engine.begin() as conn:
+            await conn.execute(text(statement))
+        await asyncio.sleep(0)
+
+
+async def _add_hot_query_indexes(db_engine: AsyncEngine):
+    """Indexes for the account, quota and usage log lookups"""
+    # Keep the oldest row of any duplicated quota type so the unique index can be built
+    async with db_engine.begin() as conn:
+        await conn.execute(text(
+            "DELETE FROM quotas WHERE id NOT IN "
+            "(SELECT MIN(id) FROM quotas GROUP BY account_id, quota_type)"
+        ))
+    
+    await _create_indexes(db_engine, [
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_quotas_account_id_quota_type ON quotas (account_id, quota_type)",
+        "CREATE INDEX IF NOT EXISTS ix_platform_accounts_user_id ON platform_accounts (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_usage_logs_account_id ON usage_logs (account_id)",
+        "CREATE INDEX IF NOT EXISTS ix_usage_logs_user_id_timestamp ON usage_logs (user_id, timestamp)",
+    ])
+
+
+async def _add_api_key_preview(db_engine: AsyncEngine, batch_size: int = 500):
+    """Store the masked API key preview so listings don't need to decrypt"""
+    await _add_column_if_missing(db_engine, "platform_accounts", "api_key_preview", "VARCHAR")
+    
+    # Backfill in batches to keep each write transaction short; only rows
+    # without a preview are selected, so an interrupted backfill resumes
+    while True:
+        async with db_engine.begin() as conn:
+            result = await conn.execute(text(
+                "SELECT id, encrypted_api_key FROM platform_accounts "
+                "WHERE api_key_preview IS NULL LIMIT :limit"
+            ), {"limit": batch_size})
+            rows = result.all()
+            if not rows:
+                break
+            
+            previews = []
+            for account_id, encrypted_api_key in rows:
+                try:
+                    preview = encryption_service.mask_api_key(encryption_service.decrypt(encrypted_api_key))
+                except Exception:
+                    preview = "***"
+                previews.append({"account_id": account_id, "preview": preview})
+            
+            await conn.execute(
+                text("UPDATE platform_accounts SET api_key_preview = :preview WHERE id = :account_id"),
+                previews
+            )
+        await asyncio.sleep(0)
+
+
+async def _add_usage_idempotency_key(db_engine: AsyncEngine):
+    """Client idempotency keys on usage logs, unique per user"""
+    await _add_column_if_missing(db_engine, "usage_logs", "idempotency_key", "VARCHAR")
+    
+    await _create_indexes(db_engine, [
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_usage_logs_user_id_idempotency_key "
+        "ON usage_logs (user_id, idempotency_key)",
+    ])
+
+
+# (version, name, upgrade) in ascending version order. Version 1 is the
+# original schema created by Base.metadata.create_all.
+MIGRATIONS: List[Migration] = [
+    (2, "hot query indexes", _add_hot_query_indexes),
+    (3, "platform account API key preview", _add_api_key_preview),
+    (4, "usage log idempotency keys", _add_usage_idempotency_key),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 1
+
+
+async def _get_current_version(conn: AsyncConnection) -> int:
+    """Recorded schema version; 0 for an empty database"""
+    table_names = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    if schema_version.name not in table_names:
+        return 1 if table_names else 0
+    
+    result = await conn.execute(select(func.max(schema_version.c.version)))
+    return result.scalar() or 1
+
+
+async def _record_version(conn: AsyncConnection, version: int, name: str):
+    await conn.execute(schema_version.insert().values(version=version, name=name))
+
+
+async def upgrade_database(db_engine: AsyncEngine = engine) -> int:
+    """Create or upgrade the database schema and return its version"""
+    async with db_engine.connect() as conn:
+        current_version = await _get_current_version(conn)
+    
+    if current_version >= LATEST_VERSION:
+        return current_version
+    
+    if current_version == 0:
+        async with db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(schema_metadata.create_all)
+            await _record_version(conn, LATEST_VERSION, "initial schema")
+        return LATEST_VERSION
+    
+    async with db_engine.begin() as conn:
+        await conn.run_sync(schema_metadata.create_all)
+    
+    for version, name, upgrade in MIGRATIONS:
+        if version <= current_version:
+            continue
+        print(f"Applying database migration {version}: {name}")
+        await upgrade(db_engine)
+        async with db_engine.begin() as conn:
+            await _record_version(conn, version, name)
+        current_version = version
+    
+    return current_version
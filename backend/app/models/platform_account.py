@@ -8,10 +8,11 @@ class PlatformAccount(Base):
     __tablename__ = "platform_accounts"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  # also covers (user_id, id) lookups
     platform_id = Column(String, nullable=False)  # e.g., "openai_free", "gemini_free"
     account_identifier = Column(String, nullable=True)  # email or username
     encrypted_api_key = Column(Text, nullable=False)  # Fernet encrypted
+    api_key_preview = Column(String, nullable=True)  # masked: "sk-...xxxx", set with the key
     is_verified = Column(Boolean, default=False)
     last_verified_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -6,6 +6,11 @@ from app.database import Base
 
 class Quota(Base):
     __tablename__ = "quotas"
+    __table_args__ = (
+        # One row per quota type; also serves every lookup by account_id.
+        # Named like the index migration 2 adds to older databases.
+        Index("uq_quotas_account_id_quota_type", "account_id", "quota_type", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("platform_accounts.id"), nullable=False)
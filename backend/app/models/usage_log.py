@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -6,14 +6,19 @@ from app.database import Base
 
 class UsageLog(Base):
     __tablename__ = "usage_logs"
+    __table_args__ = (
+        Index("ix_usage_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("uq_usage_logs_user_id_idempotency_key", "user_id", "idempotency_key", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    account_id = Column(Integer, ForeignKey("platform_accounts.id"), nullable=True)
+    account_id = Column(Integer, ForeignKey("platform_accounts.id"), nullable=True, index=True)
     action = Column(String, nullable=False)  # "api_call", "quota_check", "account_verify", etc.
     details = Column(Text, nullable=True)
     amount = Column(Float, default=0.0)  # quota used
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    idempotency_key = Column(String, nullable=True)  # client-supplied, unique per user
     
     # Relationships
     user = relationship("User", back_populates="usage_logs")
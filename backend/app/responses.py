@@ -0,0 +1,34 @@
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _orjson_default(obj: Any):
+    # orjson handles dicts, lists, floats and datetimes itself
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when it is installed.
+    
+    Content may be plain data or (lists of) Pydantic models, so endpoints
+    can return models built with model_construct without FastAPI validating
+    and encoding them again. Without orjson, content is rendered like a
+    regular JSONResponse.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+        return super().render(jsonable_encoder(content))
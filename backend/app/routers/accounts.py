@@ -1,120 +1,193 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, update, insert
+from typing import Dict, List, Optional
+import asyncio
+import json
 
-from app.database import get_db
+from app.database import async_session_maker, get_db, get_read_db
 from app.models.user import User
 from app.models.platform_account import PlatformAccount
+from app.models.quota import Quota
 from app.models.usage_log import UsageLog
-from app.schemas.account import AccountCreate, AccountUpdate, AccountResponse, AccountVerifyResponse, QuotaInfo
+from app.responses import FastJSONResponse
+from app.schemas.account import AccountCreate, AccountBulkCreate, AccountUpdate, AccountResponse, AccountVerifyResponse, QuotaInfo
 from app.routers.auth import get_current_user
 from app.services.encryption import encryption_service
+from app.services.etags import TIME_BUCKET_SECONDS, etag_matches, user_versions
+from app.services.platform_verifier import platform_verifier
+from app.services.quota_stream import quota_stream_hub
 from app.services.quota_tracker import quota_tracker
+from app.services.rate_limiter import rate_limiter
+from app.services.recommendation_engine import recommendation_engine
+from app.services.usage_rate import usage_rate_estimator
 from datetime import datetime
 
 router = APIRouter(prefix="/api/accounts", tags=["Accounts"])
 
 
-@router.post("", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
-async def create_account(
-    account_data: AccountCreate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """Register a new platform account"""
-    # Verify platform exists
-    platform_info = quota_tracker.get_platform_info(account_data.platform_id)
-    if not platform_info:
+def get_api_key_preview(account: PlatformAccount) -> str:
+    """Masked API key for display, decrypting only if no preview was stored"""
+    if account.api_key_preview is not None:
+        return account.api_key_preview
+    return encryption_service.mask_api_key(encryption_service.decrypt(account.encrypted_api_key))
+
+
+async def _create_accounts(
+    db: AsyncSession,
+    user_id: int,
+    accounts_data: List[AccountCreate]
+) -> List[AccountResponse]:
+    """
+    Create accounts with their quotas and log rows in one transaction.
+    
+    Every platform is validated before anything is written. Rows are
+    inserted with one statement per table, and the responses are built
+    from the inserted values instead of being read back.
+    """
+    unknown = [
+        f"{index}: {account_data.platform_id}"
+        for index, account_data in enumerate(accounts_data)
+        if not quota_tracker.get_platform_info(account_data.platform_id)
+    ]
+    if unknown:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unknown platform: {account_data.platform_id}"
+            detail=f"Unknown platform: {', '.join(unknown)}" if len(accounts_data) > 1
+            else f"Unknown platform: {accounts_data[0].platform_id}"
         )
     
-    # Encrypt API key
-    encrypted_key = encryption_service.encrypt(account_data.api_key)
+    now = datetime.utcnow()
+    account_rows = [
+        {
+            "user_id": user_id,
+            "platform_id": account_data.platform_id,
+            "account_identifier": account_data.account_identifier,
+            "encrypted_api_key": encryption_service.encrypt(account_data.api_key),
+            "api_key_preview": encryption_service.mask_api_key(account_data.api_key),
+            "is_verified": False,
+            "created_at": now,
+            "updated_at": now
+        }
+        for account_data in accounts_data
+    ]
     
-    # Create account
-    new_account = PlatformAccount(
-        user_id=current_user.id,
-        platform_id=account_data.platform_id,
-        account_identifier=account_data.account_identifier,
-        encrypted_api_key=encrypted_key
+    result = await db.execute(
+        insert(PlatformAccount).returning(PlatformAccount.id, sort_by_parameter_order=True),
+        account_rows
     )
+    account_ids = result.scalars().all()
     
-    db.add(new_account)
-    await db.commit()
-    await db.refresh(new_account)
-    
-    # Initialize quotas
-    await quota_tracker.initialize_quotas(db, new_account.id, account_data.platform_id)
+    quota_rows = []
+    for account_id, row in zip(account_ids, account_rows):
+        quota_rows.extend(quota_tracker.initial_quota_values(account_id, row["platform_id"], now))
+    if quota_rows:
+        await db.execute(insert(Quota), quota_rows)
     
-    # Log action
-    log = UsageLog(
-        user_id=current_user.id,
-        account_id=new_account.id,
-        action="account_created",
-        details=f"Added {account_data.platform_id} account"
-    )
-    db.add(log)
+    await db.execute(insert(UsageLog), [
+        {
+            "user_id": user_id,
+            "account_id": account_id,
+            "action": "account_created",
+            "details": f"Added {row['platform_id']} account",
+            "amount": 0.0,
+            "timestamp": now
+        }
+        for account_id, row in zip(account_ids, account_rows)
+    ])
     await db.commit()
+    recommendation_engine.invalidate(user_id)
+    quota_stream_hub.notify(user_id)
+    user_versions.bump(user_id)
     
-    # Get quotas for response
-    quotas = await quota_tracker.get_quota_status(db, new_account.id)
-    quota_responses = [QuotaInfo(**q) for q in quotas]
+    quotas_by_account: Dict[int, List[QuotaInfo]] = {account_id: [] for account_id in account_ids}
+    for quota in quota_rows:
+        quotas_by_account[quota["account_id"]].append(QuotaInfo(**quota_tracker.build_status(
+            quota["quota_type"], quota["total_quota"], quota["used_quota"], quota["reset_at"]
+        )))
     
-    return AccountResponse(
-        id=new_account.id,
-        platform_id=new_account.platform_id,
-        account_identifier=new_account.account_identifier,
-        api_key_preview=encryption_service.mask_api_key(account_data.api_key),
-        is_verified=new_account.is_verified,
-        last_verified_at=new_account.last_verified_at,
-        created_at=new_account.created_at,
-        quotas=quota_responses
-    )
+    return [
+        AccountResponse(
+            id=account_id,
+            platform_id=row["platform_id"],
+            account_identifier=row["account_identifier"],
+            api_key_preview=row["api_key_preview"],
+            is_verified=row["is_verified"],
+            last_verified_at=None,
+            created_at=row["created_at"],
+            quotas=quotas_by_account[account_id]
+        )
+        for account_id, row in zip(account_ids, account_rows)
+    ]
 
 
-@router.get("", response_model=List[AccountResponse])
-async def list_accounts(
+@router.post("", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
+async def create_account(
+    account_data: AccountCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Register a new platform account"""
+    accounts = await _create_accounts(db, current_user.id, [account_data])
+    return accounts[0]
+
+
+@router.post("/bulk", response_model=List[AccountResponse], status_code=status.HTTP_201_CREATED)
+async def create_accounts_bulk(
+    bulk_data: AccountBulkCreate,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
+):
+    """Register several platform accounts at once (all or nothing)"""
+    return await _create_accounts(db, current_user.id, bulk_data.accounts)
+
+
+@router.get("", response_model=List[AccountResponse], response_class=FastJSONResponse)
+async def list_accounts(
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all user's platform accounts"""
+    etag = user_versions.etag(current_user.id, "accounts", TIME_BUCKET_SECONDS)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
     result = await db.execute(
         select(PlatformAccount).where(PlatformAccount.user_id == current_user.id)
     )
     accounts = result.scalars().all()
     
+    # Get quotas for all accounts at once
+    quotas_by_account = await quota_tracker.get_quota_status_many(
+        db, [account.id for account in accounts]
+    )
+    
+    # Rows and quota statuses are already well-typed, so models aren't re-validated
     response = []
     for account in accounts:
-        # Decrypt to get preview (we only show masked version)
-        decrypted_key = encryption_service.decrypt(account.encrypted_api_key)
-        api_key_preview = encryption_service.mask_api_key(decrypted_key)
+        quota_responses = [QuotaInfo.model_construct(**q) for q in quotas_by_account[account.id]]
         
-        # Get quotas
-        quotas = await quota_tracker.get_quota_status(db, account.id)
-        quota_responses = [QuotaInfo(**q) for q in quotas]
-        
-        response.append(AccountResponse(
+        response.append(AccountResponse.model_construct(
             id=account.id,
             platform_id=account.platform_id,
             account_identifier=account.account_identifier,
-            api_key_preview=api_key_preview,
+            api_key_preview=get_api_key_preview(account),
             is_verified=account.is_verified,
             last_verified_at=account.last_verified_at,
             created_at=account.created_at,
             quotas=quota_responses
         ))
     
-    return response
+    return FastJSONResponse(response, headers={"ETag": etag})
 
 
 @router.get("/{account_id}", response_model=AccountResponse)
 async def get_account(
     account_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get account details with quota information"""
     result = await db.execute(
@@ -128,10 +201,6 @@ async def get_account(
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    # Decrypt to get preview
-    decrypted_key = encryption_service.decrypt(account.encrypted_api_key)
-    api_key_preview = encryption_service.mask_api_key(decrypted_key)
-    
     # Get quotas
     quotas = await quota_tracker.get_quota_status(db, account.id)
     quota_responses = [QuotaInfo(**q) for q in quotas]
@@ -140,7 +209,7 @@ async def get_account(
         id=account.id,
         platform_id=account.platform_id,
         account_identifier=account.account_identifier,
-        api_key_preview=api_key_preview,
+        api_key_preview=get_api_key_preview(account),
         is_verified=account.is_verified,
         last_verified_at=account.last_verified_at,
         created_at=account.created_at,
@@ -177,10 +246,106 @@ async def delete_account(
     # Delete account (cascades to quotas and logs)
     await db.delete(account)
     await db.commit()
+    recommendation_engine.invalidate(current_user.id)
+    quota_stream_hub.notify(current_user.id)
+    user_versions.bump(current_user.id)
+    usage_rate_estimator.forget(account_id)
+    rate_limiter.forget(account_id)
     
     return None
 
 
+async def _record_verifications(db: AsyncSession, user_id: int, results: List[Dict]):
+    """Store verification outcomes and log them, in one transaction"""
+    now = datetime.utcnow()
+    verified = [result["account_id"] for result in results if result["success"]]
+    rejected = [
+        result["account_id"] for result in results
+        if not result["success"] and result["definitive"]
+    ]
+    
+    if verified:
+        await db.execute(
+            update(PlatformAccount)
+            .where(PlatformAccount.id.in_(verified))
+            .values(is_verified=True, last_verified_at=now)
+        )
+    if rejected:
+        await db.execute(
+            update(PlatformAccount)
+            .where(PlatformAccount.id.in_(rejected))
+            .values(is_verified=False, last_verified_at=now)
+        )
+    if results:
+        await db.execute(insert(UsageLog), [
+            {
+                "user_id": user_id,
+                "account_id": result["account_id"],
+                "action": "account_verified" if result["success"] else "account_verification_failed",
+                "details": result["message"],
+                "amount": 0.0,
+                "timestamp": now
+            }
+            for result in results
+        ])
+    await db.commit()
+    user_versions.bump(user_id)
+
+
+def _decrypt_for_verification(account: PlatformAccount) -> str:
+    try:
+        return encryption_service.decrypt(account.encrypted_api_key)
+    except Exception as e:
+        print(f"Error decrypting API key of account {account.id}: {e}")
+        return ""
+
+
+@router.post("/verify-all")
+async def verify_all_accounts(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Verify all of the user's accounts in parallel.
+    
+    Results are streamed as newline-delimited JSON, one line per account
+    in the order the checks finish.
+    """
+    result = await db.execute(
+        select(PlatformAccount).where(PlatformAccount.user_id == current_user.id)
+    )
+    credentials = [
+        (account.id, account.platform_id, _decrypt_for_verification(account))
+        for account in result.scalars().all()
+    ]
+    user_id = current_user.id
+    
+    async def store(results: List[Dict]):
+        # The request's session is closed once streaming starts
+        async with async_session_maker() as session:
+            await _record_verifications(session, user_id, results)
+    
+    async def stream():
+        results = []
+        try:
+            async for verification in platform_verifier.verify_many(credentials):
+                results.append(verification)
+                yield json.dumps({
+                    "account_id": verification["account_id"],
+                    "success": verification["success"],
+                    "message": verification["message"],
+                    "details": verification["details"],
+                    "cached": verification["cached"]
+                }) + "\n"
+        finally:
+            # Also keep the checks that finished if the client disconnected;
+            # shielded so the write completes even though the stream is cancelled
+            if results:
+                await asyncio.shield(store(results))
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.post("/{account_id}/verify", response_model=AccountVerifyResponse)
 async def verify_account(
     account_id: int,
@@ -199,38 +364,16 @@ async def verify_account(
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    # For MVP, we'll do a simple verification
-    # In production, this would test actual API calls to each platform
     try:
-        # Decrypt API key to verify it's accessible
-        decrypted_key = encryption_service.decrypt(account.encrypted_api_key)
-        
-        if not decrypted_key:
-            return AccountVerifyResponse(
-                success=False,
-                message="API key is empty or invalid",
-                details=None
-            )
-        
-        # Update verification status
-        account.is_verified = True
-        account.last_verified_at = datetime.utcnow()
-        await db.commit()
-        
-        # Log action
-        log = UsageLog(
-            user_id=current_user.id,
-            account_id=account.id,
-            action="account_verified",
-            details=f"Verified {account.platform_id} account"
+        verification = await platform_verifier.verify(
+            account.id, account.platform_id, _decrypt_for_verification(account)
         )
-        db.add(log)
-        await db.commit()
+        await _record_verifications(db, current_user.id, [verification])
         
         return AccountVerifyResponse(
-            success=True,
-            message="Account verified successfully",
-            details={"platform_id": account.platform_id}
+            success=verification["success"],
+            message=verification["message"],
+            details=verification["details"]
         )
     
     except Exception as e:
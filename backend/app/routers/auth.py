@@ -2,30 +2,61 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
+import time
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.schemas.auth import UserCreate, UserLogin, UserUpdate, UserResponse, Token
 from app.config import settings
+from app.services.password_hasher import password_hasher, PasswordHasherBusy
+from app.services.ttl_cache import TTLCache
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Verified token -> email, and email -> detached snapshot of the user row.
+# Entries live for at most auth_cache_ttl_seconds (and never past the token's
+# expiry); call invalidate_user whenever a user row changes.
+token_cache = TTLCache(settings.auth_cache_max_entries, settings.auth_cache_ttl_seconds)
+user_cache = TTLCache(settings.auth_cache_max_entries, settings.auth_cache_ttl_seconds)
 
-def hash_password(password: str) -> str:
+
+def invalidate_user(email: str):
+    """Drop the cached snapshot of a user after it was updated or deactivated"""
+    user_cache.pop(email)
+
+
+def _snapshot_user(user: User) -> User:
+    """Copy a user row into a detached instance that can be shared between requests"""
+    return User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+
+def _password_hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def hash_password(password: str) -> str:
     """Hash password using bcrypt"""
-    return pwd_context.hash(password)
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise _password_hasher_busy()
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise _password_hasher_busy()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -43,29 +74,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> User:
-    """Get current authenticated user"""
+    """
+    Get current authenticated user.
+    
+    The lookup uses the read session. Unless a separate read database is
+    configured that is the same dependency as get_db, so every endpoint
+    shares its session with this lookup.
+    The returned user is a detached snapshot shared through the auth cache;
+    endpoints that modify the user must load it into their own session.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        email: str = payload.get("sub")
-        if email is None:
+    token = credentials.credentials
+    email = token_cache.get(token)
+    if email is None:
+        try:
+            payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+            email = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
+        
+        expires_in = payload.get("exp", 0) - time.time()
+        token_cache.set(token, email, min(settings.auth_cache_ttl_seconds, expires_in))
     
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            raise credentials_exception
+        
+        user = _snapshot_user(user)
+        user_cache.set(email, user)
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -87,7 +136,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password
@@ -113,7 +162,7 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == user_data.email))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if not user or not await verify_password(user_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -145,18 +194,21 @@ async def update_me(
     db: AsyncSession = Depends(get_db)
 ):
     """Update current user profile"""
+    user = await db.get(User, current_user.id)
+    
     if user_update.telegram_chat_id is not None:
-        current_user.telegram_chat_id = user_update.telegram_chat_id
+        user.telegram_chat_id = user_update.telegram_chat_id
     
     if user_update.preferred_language is not None:
-        current_user.preferred_language = user_update.preferred_language
+        user.preferred_language = user_update.preferred_language
     
     if user_update.timezone is not None:
-        current_user.timezone = user_update.timezone
+        user.timezone = user_update.timezone
     
-    current_user.updated_at = datetime.utcnow()
+    user.updated_at = datetime.utcnow()
     
     await db.commit()
-    await db.refresh(current_user)
+    await db.refresh(user)
+    invalidate_user(user.email)
     
-    return UserResponse.model_validate(current_user)
+    return UserResponse.model_validate(user)
@@ -1,9 +1,92 @@
-from fastapi import APIRouter
-from typing import List, Dict
+from fastapi import APIRouter, Header, Response, status
+from typing import List, Dict, Optional, Tuple
+import copy
+import json
+from app.config import settings
+from app.services.etags import etag_matches
+from app.services.platform_catalog import platform_catalog
 from app.services.quota_tracker import quota_tracker
 
 router = APIRouter(prefix="/api/guides", tags=["Guides"])
 
+# Browsers and proxies may reuse a guide this long before revalidating
+GUIDES_MAX_AGE_SECONDS = 300
+
+# Common steps for all platforms ({signup_url} is filled in per platform)
+GUIDE_STEPS = [
+    {
+        "step": 1,
+        "title": "Visit the Platform",
+        "description": "Go to {signup_url}",
+        "tips": ["Use a dedicated email for AI platforms", "Consider using email aliases (e.g., yourname+ai@gmail.com)"]
+    },
+    {
+        "step": 2,
+        "title": "Create Account",
+        "description": "Sign up with your email address",
+        "tips": ["Use a strong, unique password", "Enable 2FA if available"]
+    },
+    {
+        "step": 3,
+        "title": "Verify Email",
+        "description": "Check your inbox and verify your email address",
+        "tips": ["Check spam folder if you don't see the email", "Make sure to complete verification"]
+    },
+    {
+        "step": 4,
+        "title": "Get API Key",
+        "description": "Navigate to API settings and generate your API key",
+        "tips": [
+            "Store your API key securely",
+            "Never share your API key publicly",
+            "Copy the key immediately - some platforms only show it once"
+        ]
+    },
+    {
+        "step": 5,
+        "title": "Connect to Open Crow",
+        "description": "Return to Open Crow and add your account with the API key",
+        "tips": [
+            "Your API key is encrypted and stored securely",
+            "You can disconnect anytime from the Accounts page"
+        ]
+    }
+]
+
+# Platform-specific tips
+PLATFORM_TIPS = {
+    "openai_free": [
+        "ChatGPT Free has a 3-hour rolling window for quotas",
+        "GPT-4o access is limited but powerful",
+        "Use for complex reasoning tasks"
+    ],
+    "gemini_free": [
+        "Gemini has both per-minute and daily limits",
+        "Great for high-volume tasks within limits",
+        "Google account required"
+    ],
+    "claude_free": [
+        "Claude excels at long-form content",
+        "30 messages per day - use wisely",
+        "Great for writing and analysis"
+    ],
+    "leonardo_free": [
+        "Focused on image generation",
+        "150 tokens resets daily",
+        "Each generation costs different token amounts"
+    ],
+    "huggingface_free": [
+        "Access to thousands of open-source models",
+        "Free tier has rate limits",
+        "Great for experimentation"
+    ],
+    "cohere_free": [
+        "Strong text generation and embeddings",
+        "1000 calls per month",
+        "Good for semantic search and classification"
+    ]
+}
+
 
 def get_platform_guide(platform_id: str) -> Dict:
     """Generate detailed guide for a platform"""
@@ -12,8 +95,10 @@ def get_platform_guide(platform_id: str) -> Dict:
     if not platform_info:
         return {}
     
-    # Generate step-by-step guide
-    guide = {
+    steps = copy.deepcopy(GUIDE_STEPS)
+    steps[0]["description"] = steps[0]["description"].format(signup_url=platform_info.get("signup_url", ""))
+    
+    return {
         "platform_id": platform_id,
         "platform_name": platform_info["name"],
         "description": platform_info.get("description", ""),
@@ -21,92 +106,18 @@ def get_platform_guide(platform_id: str) -> Dict:
         "signup_url": platform_info.get("signup_url", ""),
         "api_docs_url": platform_info.get("api_docs_url", ""),
         "quotas": platform_info.get("quotas", []),
-        "steps": []
+        "steps": steps,
+        "platform_tips": PLATFORM_TIPS.get(platform_id, [])
     }
-    
-    # Common steps for all platforms
-    guide["steps"] = [
-        {
-            "step": 1,
-            "title": "Visit the Platform",
-            "description": f"Go to {platform_info.get('signup_url', '')}",
-            "tips": ["Use a dedicated email for AI platforms", "Consider using email aliases (e.g., yourname+ai@gmail.com)"]
-        },
-        {
-            "step": 2,
-            "title": "Create Account",
-            "description": "Sign up with your email address",
-            "tips": ["Use a strong, unique password", "Enable 2FA if available"]
-        },
-        {
-            "step": 3,
-            "title": "Verify Email",
-            "description": "Check your inbox and verify your email address",
-            "tips": ["Check spam folder if you don't see the email", "Make sure to complete verification"]
-        },
-        {
-            "step": 4,
-            "title": "Get API Key",
-            "description": "Navigate to API settings and generate your API key",
-            "tips": [
-                "Store your API key securely",
-                "Never share your API key publicly",
-                "Copy the key immediately - some platforms only show it once"
-            ]
-        },
-        {
-            "step": 5,
-            "title": "Connect to Open Crow",
-            "description": "Return to Open Crow and add your account with the API key",
-            "tips": [
-                "Your API key is encrypted and stored securely",
-                "You can disconnect anytime from the Accounts page"
-            ]
-        }
-    ]
-    
-    # Platform-specific tips
-    platform_tips = {
-        "openai_free": [
-            "ChatGPT Free has a 3-hour rolling window for quotas",
-            "GPT-4o access is limited but powerful",
-            "Use for complex reasoning tasks"
-        ],
-        "gemini_free": [
-            "Gemini has both per-minute and daily limits",
-            "Great for high-volume tasks within limits",
-            "Google account required"
-        ],
-        "claude_free": [
-            "Claude excels at long-form content",
-            "30 messages per day - use wisely",
-            "Great for writing and analysis"
-        ],
-        "leonardo_free": [
-            "Focused on image generation",
-            "150 tokens resets daily",
-            "Each generation costs different token amounts"
-        ],
-        "huggingface_free": [
-            "Access to thousands of open-source models",
-            "Free tier has rate limits",
-            "Great for experimentation"
-        ],
-        "cohere_free": [
-            "Strong text generation and embeddings",
-            "1000 calls per month",
-            "Good for semantic search and classification"
-        ]
-    }
-    
-    guide["platform_tips"] = platform_tips.get(platform_id, [])
-    
-    return guide
 
 
-@router.get("", response_model=List[Dict])
-async def list_guides():
-    """Get list of all platform guides"""
+def _to_json(content) -> bytes:
+    # Same encoding as FastAPI's JSONResponse
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _compile_guides() -> Tuple[bytes, Dict[str, bytes]]:
+    """Serialize the guide list and every platform's guide"""
     platforms = quota_tracker.platform_data.get("platforms", [])
     
     guides = []
@@ -119,15 +130,56 @@ async def list_guides():
             "signup_url": platform.get("signup_url", "")
         })
     
-    return guides
+    return _to_json(guides), {
+        platform["id"]: _to_json(get_platform_guide(platform["id"])) for platform in platforms
+    }
+
+
+# (catalog version, guide list, guides by platform), rebuilt when the catalog changes
+_compiled_guides: Optional[Tuple[str, bytes, Dict[str, bytes]]] = None
+_NOT_FOUND = _to_json({"error": "Platform not found"})
+
+
+def get_compiled_guides() -> Tuple[bytes, Dict[str, bytes]]:
+    """Pre-serialized guides for the current platform catalog"""
+    global _compiled_guides
+    version = platform_catalog.version
+    if _compiled_guides is None or _compiled_guides[0] != version:
+        guide_list, guides = _compile_guides()
+        _compiled_guides = (version, guide_list, guides)
+    return _compiled_guides[1], _compiled_guides[2]
+
+
+def get_guides_etag() -> str:
+    """Guides only change with the platform catalog (or a new release)"""
+    return f'"guides-{settings.app_version}-{platform_catalog.version[:16]}"'
+
+
+def _guide_response(content: bytes, etag: str) -> Response:
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": f"public, max-age={GUIDES_MAX_AGE_SECONDS}"}
+    )
+
+
+@router.get("", response_model=List[Dict])
+async def list_guides(if_none_match: Optional[str] = Header(None)):
+    """Get list of all platform guides"""
+    etag = get_guides_etag()
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    guide_list, _ = get_compiled_guides()
+    return _guide_response(guide_list, etag)
 
 
 @router.get("/{platform_id}", response_model=Dict)
-async def get_guide(platform_id: str):
+async def get_guide(platform_id: str, if_none_match: Optional[str] = Header(None)):
     """Get detailed guide for a specific platform"""
-    guide = get_platform_guide(platform_id)
-    
-    if not guide:
-        return {"error": "Platform not found"}
+    etag = get_guides_etag()
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
     
-    return guide
+    _, guides = get_compiled_guides()
+    return _guide_response(guides.get(platform_id, _NOT_FOUND), etag)
@@ -1,75 +1,62 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from typing import Dict, Optional
+import asyncio
+import json
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_read_db, read_session_maker
 from app.models.user import User
+from app.responses import FastJSONResponse
 from app.routers.auth import get_current_user
 from app.schemas.quota import DashboardResponse, RecommendationResponse, ScheduleResponse, PlatformQuotaInfo, ScheduleItem
 from app.services.quota_tracker import quota_tracker
+from app.services.etags import TIME_BUCKET_SECONDS, etag_matches, user_versions
 from app.services.quota_optimizer import quota_optimizer
+from app.services.quota_stream import quota_stream_hub
+from app.services.recommendation_engine import recommendation_engine
 from sqlalchemy import select
 from app.models.platform_account import PlatformAccount
 
 router = APIRouter(prefix="/api/quota", tags=["Quota"])
 
 
-@router.get("/dashboard", response_model=DashboardResponse)
+@router.get("/dashboard", response_model=DashboardResponse, response_class=FastJSONResponse)
 async def get_dashboard(
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get complete quota dashboard"""
+    etag = user_versions.etag(current_user.id, "dashboard", TIME_BUCKET_SECONDS)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
     # Get all user's accounts
     result = await db.execute(
         select(PlatformAccount).where(PlatformAccount.user_id == current_user.id)
     )
     accounts = result.scalars().all()
     
+    quotas_by_account = await quota_tracker.get_quota_status_many(
+        db, [account.id for account in accounts]
+    )
+    
     platforms = []
     total_usage = 0
     total_quotas = 0
     
-    for account in accounts:
-        platform_info = quota_tracker.get_platform_info(account.platform_id)
-        if not platform_info:
-            continue
-        
-        quotas = await quota_tracker.get_quota_status(db, account.id)
-        
-        # Calculate urgency score
-        if quotas:
-            avg_urgency = sum(
-                quota_optimizer.calculate_urgency_score(q) for q in quotas
-            ) / len(quotas)
-            
-            # Find most urgent quota for time display
-            most_urgent = max(quotas, key=lambda q: quota_optimizer.calculate_urgency_score(q))
-            time_until_reset = quota_optimizer._format_timedelta(
-                most_urgent["reset_at"] - datetime.utcnow()
-            )
-            
-            # Calculate recommendation
-            recommendation = "Use now" if avg_urgency > 70 else "Available" if avg_urgency > 30 else "Low priority"
-        else:
-            avg_urgency = 0
-            time_until_reset = "N/A"
-            recommendation = "No quota data"
-        
+    for platform in quota_optimizer.build_platform_scores(accounts, quotas_by_account):
         # Aggregate usage
-        for quota in quotas:
+        for quota in platform["quotas"]:
             total_usage += quota["used_quota"]
             total_quotas += quota["total_quota"]
         
-        platforms.append(PlatformQuotaInfo(
-            platform_id=account.platform_id,
-            platform_name=platform_info["name"],
-            account_id=account.id,
-            quotas=quotas,
-            urgency_score=avg_urgency,
-            recommendation=recommendation,
-            time_until_reset=time_until_reset
-        ))
+        # Built from our own data, so skip validation
+        platforms.append(PlatformQuotaInfo.model_construct(**platform))
     
     # Calculate overall usage percentage
     overall_percentage = (total_usage / total_quotas * 100) if total_quotas > 0 else 0
@@ -77,22 +64,23 @@ async def get_dashboard(
     # Get all supported platforms count
     all_platforms = quota_tracker.platform_data.get("platforms", [])
     
-    return DashboardResponse(
+    dashboard = DashboardResponse.model_construct(
         total_platforms=len(all_platforms),
         connected_accounts=len(accounts),
         total_quota_usage_percentage=round(overall_percentage, 2),
         platforms=platforms,
         last_updated=datetime.utcnow()
     )
+    return FastJSONResponse(dashboard, headers={"ETag": etag})
 
 
 @router.get("/recommendations", response_model=RecommendationResponse)
 async def get_recommendations(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get platform recommendations for optimal usage"""
-    recommendations = await quota_optimizer.get_recommendations(db, current_user.id)
+    recommendations = await recommendation_engine.get_recommendations(db, current_user.id)
     
     return RecommendationResponse(
         recommended_platform=recommendations.get("recommended_platform"),
@@ -104,10 +92,10 @@ async def get_recommendations(
 @router.get("/schedule", response_model=ScheduleResponse)
 async def get_schedule(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get optimal daily usage schedule"""
-    schedule = await quota_optimizer.generate_daily_schedule(db, current_user.id)
+    schedule = await recommendation_engine.get_daily_schedule(db, current_user.id, current_user.timezone)
     
     schedule_items = [ScheduleItem(**item) for item in schedule]
     
@@ -118,11 +106,72 @@ async def get_schedule(
     )
 
 
+def _sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+@router.get("/stream")
+async def stream_quota(current_user: User = Depends(get_current_user)):
+    """
+    Live quota updates as server-sent events.
+    
+    The stream starts with a "snapshot" event holding every account's
+    quotas, then sends a "quota" event for an account whenever usage is
+    recorded on it, and a new "snapshot" when quotas reset or accounts are
+    added or removed. Updates are coalesced to at most one push per
+    QUOTA_STREAM_MIN_INTERVAL_SECONDS; a comment line is sent as keep-alive.
+    """
+    user_id = current_user.id
+    subscription = quota_stream_hub.subscribe(user_id)
+    
+    async def events():
+        try:
+            full_refresh, changed_accounts = True, set()
+            while True:
+                if full_refresh or changed_accounts:
+                    # The request's session is closed once streaming starts
+                    async with read_session_maker() as db:
+                        snapshot = await recommendation_engine.get_snapshot(db, user_id)
+                    quotas_by_account = recommendation_engine.current_quotas(snapshot)
+                    
+                    accounts = [
+                        {
+                            "account_id": account.id,
+                            "platform_id": account.platform_id,
+                            "quotas": quotas_by_account[account.id]
+                        }
+                        for account in snapshot["accounts"]
+                        if full_refresh or account.id in changed_accounts
+                    ]
+                    if full_refresh:
+                        yield _sse_event("snapshot", {"accounts": accounts})
+                    else:
+                        for account in accounts:
+                            yield _sse_event("quota", account)
+                
+                await asyncio.sleep(settings.quota_stream_min_interval_seconds)
+                try:
+                    await asyncio.wait_for(
+                        subscription.changed.wait(), settings.quota_stream_keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                full_refresh, changed_accounts = subscription.take_changes()
+        finally:
+            quota_stream_hub.unsubscribe(user_id, subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{account_id}")
 async def get_account_quota(
     account_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get detailed quota information for a specific account"""
     result = await db.execute(
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import math
+
+from app.database import get_read_db
+from app.models.user import User
+from app.routers.auth import get_current_user
+from app.schemas.routing import RouteRequest, RouteResponse
+from app.services.encryption import encryption_service
+from app.services.quota_tracker import quota_tracker
+from app.services.request_router import request_router
+
+router = APIRouter(prefix="/api/route", tags=["Routing"])
+
+
+@router.post("", response_model=RouteResponse)
+async def route_request(
+    route: RouteRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Pick the best account for a request, reserve its usage and return its
+    credentials. The reservation already counts as usage; clients that also
+    report their calls must use the reservation_id as the idempotency_key.
+    """
+    result = await request_router.route(
+        db, current_user.id, route.amount, route.platform_id, route.action
+    )
+    
+    if result["status"] == "no_accounts":
+        raise HTTPException(status_code=404, detail="No connected accounts found")
+    if result["status"] == "too_large":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Amount exceeds the per-minute limit of every matching account"
+        )
+    if result["status"] == "rate_limited":
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="All matching accounts are rate limited",
+            headers={"Retry-After": str(max(1, math.ceil(result["retry_after"])))}
+        )
+    if result["status"] == "exhausted":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No account has enough remaining quota"
+        )
+    
+    account = result["account"]
+    platform_info = quota_tracker.get_platform_info(account.platform_id)
+    
+    return RouteResponse(
+        account_id=account.id,
+        platform_id=account.platform_id,
+        platform_name=platform_info["name"] if platform_info else "Unknown",
+        api_key=encryption_service.decrypt(account.encrypted_api_key),
+        reserved_amount=route.amount,
+        reservation_id=result["reservation_id"],
+        quotas=result["quotas"]
+    )
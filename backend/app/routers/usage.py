@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_read_db
+from app.models.user import User
+from app.routers.auth import get_current_user
+from app.schemas.usage import UsageEventBatch, UsageEventsResponse
+from app.services.usage_ingest import usage_ingestor
+
+router = APIRouter(prefix="/api/usage", tags=["Usage"])
+
+
+@router.post("/events", response_model=UsageEventsResponse, status_code=status.HTTP_202_ACCEPTED)
+async def record_usage_events(
+    batch: UsageEventBatch,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Report a batch of usage events.
+    
+    Events are applied asynchronously; an event whose idempotency_key was
+    already reported is counted as a duplicate and not applied again. Calls
+    made through /api/route are already charged: report them, if at all,
+    with the route's reservation_id as the idempotency_key.
+    """
+    if len(batch.events) > settings.usage_events_max_batch:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.usage_events_max_batch} events per request"
+        )
+    
+    result = await usage_ingestor.ingest(db, current_user.id, batch.events)
+    return UsageEventsResponse(**result)
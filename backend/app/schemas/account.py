@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -9,6 +9,10 @@ class AccountCreate(BaseModel):
     api_key: str
 
 
+class AccountBulkCreate(BaseModel):
+    accounts: List[AccountCreate] = Field(..., min_length=1, max_length=100)
+
+
 class AccountUpdate(BaseModel):
     account_identifier: Optional[str] = None
     api_key: Optional[str] = None
@@ -33,6 +33,9 @@ class ScheduleItem(BaseModel):
     platform_name: str
     action: str
     reason: str
+    account_id: Optional[int] = None
+    amount: Optional[float] = None
+    starts_at: Optional[datetime] = None
 
 
 class ScheduleResponse(BaseModel):
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+
+class RouteRequest(BaseModel):
+    amount: float = Field(1.0, gt=0)
+    platform_id: Optional[str] = None  # restrict routing to one platform
+    action: str = "api_call"
+
+
+class RouteResponse(BaseModel):
+    account_id: int
+    platform_id: str
+    platform_name: str
+    api_key: str
+    reserved_amount: float
+    # Report the call to /api/usage/events under this idempotency_key, if at all
+    reservation_id: str
+    quotas: List[dict]
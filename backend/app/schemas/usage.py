@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+
+class UsageEvent(BaseModel):
+    account_id: int
+    amount: float = Field(1.0, gt=0)
+    timestamp: Optional[datetime] = None  # defaults to the time it is received
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=128)
+    action: str = "api_call"
+    details: Optional[str] = None
+
+
+class UsageEventBatch(BaseModel):
+    events: List[UsageEvent] = Field(..., min_length=1)
+
+
+class RejectedUsageEvent(BaseModel):
+    index: int
+    reason: str
+
+
+class UsageEventsResponse(BaseModel):
+    accepted: int
+    duplicates: int
+    rejected: List[RejectedUsageEvent]
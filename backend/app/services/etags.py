@@ -0,0 +1,61 @@
+from typing import Dict, Optional
+import secrets
+import time
+
+# Responses derived from the current time get a new ETag at least this often
+TIME_BUCKET_SECONDS = 60
+
+
+class UserVersions:
+    """
+    Per-user change counters used to build ETags.
+    
+    The counter of a user is bumped on every write to their accounts,
+    quotas or usage, so an unchanged counter means an unchanged response
+    and conditional requests can be answered without touching the database.
+    Counters live in memory; each process gets a random instance id in its
+    ETags so counters restarting at zero never collide.
+    """
+    
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._instance = secrets.token_hex(4)
+    
+    def bump(self, user_id: int):
+        """Record that the user's data changed"""
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+    
+    def get(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+    
+    def etag(self, user_id: int, resource: str, bucket_seconds: Optional[int] = None) -> str:
+        """
+        Weak ETag of a user's resource. Responses with time-derived fields
+        (reset countdowns, urgency) pass bucket_seconds so the ETag also
+        changes as time passes.
+        """
+        tag = f"{resource}-{self._instance}-{user_id}-{self.get(user_id)}"
+        if bucket_seconds:
+            tag += f"-{int(time.time() // bucket_seconds)}"
+        return f'W/"{tag}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque_tag:
+            return True
+    return False
+
+
+# Singleton instance
+user_versions = UserVersions()
@@ -0,0 +1,148 @@
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import asyncio
+import random
+
+import httpx
+
+from app.config import settings
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClient:
+    """
+    Shared outbound HTTP client for platform APIs and notifications.
+    
+    One httpx.AsyncClient is kept for the application's lifetime, so
+    connections (and TLS sessions) are pooled and kept alive; HTTP/2 is used
+    when the h2 package is installed. Requests to the same host are limited
+    to per_host_limit at a time. Failed requests are retried with jittered
+    exponential backoff: connection failures always, and timeouts and
+    429/5xx responses only for idempotent methods (or when the server said
+    to retry with a 429/503).
+    """
+    
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+    # Longest Retry-After (seconds) honoured before giving up
+    MAX_RETRY_AFTER = 30.0
+    
+    def __init__(
+        self,
+        timeout: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        per_host_limit: int,
+        max_retries: int,
+        backoff: float
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+    
+    def start(self):
+        """Create the pooled client"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections
+                )
+            )
+    
+    async def stop(self):
+        """Close the pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_slots.clear()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The underlying client, created on first use outside the app lifespan"""
+        if self._client is None:
+            self.start()
+        return self._client
+    
+    def _get_host_slots(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = asyncio.Semaphore(self.per_host_limit)
+            self._host_slots[host] = slots
+        return slots
+    
+    def _backoff_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After if given"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return random.uniform(0, min(self.MAX_RETRY_AFTER, self.backoff * 2 ** attempt))
+    
+    async def request(self, method: str, url: str, max_retries: Optional[int] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying transient failures.
+        
+        Returns the last response (which may still be an error status) or
+        raises the last transport error once retries are exhausted.
+        """
+        method = method.upper()
+        retries = self.max_retries if max_retries is None else max_retries
+        idempotent = method in self.IDEMPOTENT_METHODS
+        
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with self._get_host_slots(url):
+                    response = await self.client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # The request never reached the server, so it is always safe to retry
+                if attempt >= retries:
+                    raise
+            except httpx.TransportError:
+                if attempt >= retries or not idempotent:
+                    raise
+            
+            if response is not None:
+                retryable = response.status_code in self.RETRY_STATUSES and (
+                    idempotent or response.status_code in (429, 503)
+                )
+                if not retryable or attempt >= retries:
+                    return response
+            
+            delay = self._backoff_delay(attempt, response)
+            if delay > self.MAX_RETRY_AFTER:
+                return response
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+    
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+
+# Singleton instance
+http_client = HttpClient(
+    timeout=settings.http_timeout_seconds,
+    max_connections=settings.http_max_connections,
+    max_keepalive_connections=settings.http_max_keepalive_connections,
+    per_host_limit=settings.http_per_host_concurrency,
+    max_retries=settings.http_max_retries,
+    backoff=settings.http_retry_backoff_seconds
+)
@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from typing import Optional
+import asyncio
+
+from app.config import settings
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password operations are already queued"""
+
+
+class PasswordHasher:
+    """
+    Service for bcrypt hashing and verification off the event loop.
+    
+    Work runs on a dedicated, size-limited thread pool (bcrypt releases the
+    GIL while hashing). At most max_pending operations may be running or
+    waiting; callers beyond that wait up to queue_timeout for a slot and then
+    get PasswordHasherBusy, so login bursts can't queue unbounded work.
+    """
+    
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+    
+    def start(self):
+        """Create the worker pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+            self._slots = asyncio.Semaphore(self.max_pending)
+    
+    async def _run(self, func, *args):
+        if self._executor is None:
+            # Used outside the app lifespan
+            self.start()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise PasswordHasherBusy()
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._slots.release()
+    
+    async def hash(self, password: str) -> str:
+        """Hash password using bcrypt"""
+        return await self._run(self.context.hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify password against hash"""
+        return await self._run(self.context.verify, plain_password, hashed_password)
+    
+    def shutdown(self):
+        """Stop the worker threads; a later start creates a new pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    queue_timeout=settings.password_hash_queue_timeout_seconds,
+    rounds=settings.bcrypt_rounds
+)
@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional
+import hashlib
+import json
+import os
+import time
+
+
+PLATFORM_DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "platform_quotas.json"
+
+# Used when the data file doesn't exist
+DEFAULT_PLATFORM_DATA = {
+    "platforms": [
+        {
+            "id": "openai_free",
+            "name": "ChatGPT Free",
+            "quotas": [
+                {"type": "3hour", "limit": 50, "reset_hours": 3, "unit": "messages"}
+            ]
+        },
+        {
+            "id": "gemini_free",
+            "name": "Gemini Free",
+            "quotas": [
+                {"type": "minute", "limit": 60, "reset_hours": 0.0166, "unit": "requests"},
+                {"type": "daily", "limit": 1500, "reset_hours": 24, "unit": "requests"}
+            ]
+        },
+        {
+            "id": "claude_free",
+            "name": "Claude Free",
+            "quotas": [
+                {"type": "daily", "limit": 30, "reset_hours": 24, "unit": "messages"}
+            ]
+        },
+        {
+            "id": "leonardo_free",
+            "name": "Leonardo AI Free",
+            "quotas": [
+                {"type": "daily", "limit": 150, "reset_hours": 24, "unit": "tokens"}
+            ]
+        },
+        {
+            "id": "huggingface_free",
+            "name": "Hugging Face Free",
+            "quotas": [
+                {"type": "monthly", "limit": 1000, "reset_hours": 720, "unit": "requests"}
+            ]
+        },
+        {
+            "id": "cohere_free",
+            "name": "Cohere Free",
+            "quotas": [
+                {"type": "monthly", "limit": 1000, "reset_hours": 720, "unit": "calls"}
+            ]
+        }
+    ]
+}
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable, indexed view of the platform catalog at one point in time"""
+    
+    data: Dict
+    platforms: Mapping[str, Dict]
+    quota_specs: Mapping[str, Mapping[str, Dict]]
+    reset_periods: Mapping[str, Mapping[str, timedelta]]
+    version: str
+    mtime: Optional[float]
+
+
+def compile_catalog(data: Dict, version: str, mtime: Optional[float] = None) -> CatalogSnapshot:
+    """Build the lookup indexes for raw platform catalog data"""
+    platforms = {}
+    quota_specs = {}
+    reset_periods = {}
+    
+    for platform in data.get("platforms", []):
+        platform_id = platform["id"]
+        platforms[platform_id] = platform
+        
+        specs = {}
+        periods = {}
+        for quota_info in platform.get("quotas", []):
+            specs[quota_info["type"]] = quota_info
+            periods[quota_info["type"]] = timedelta(hours=quota_info["reset_hours"])
+        
+        quota_specs[platform_id] = MappingProxyType(specs)
+        reset_periods[platform_id] = MappingProxyType(periods)
+    
+    return CatalogSnapshot(
+        data=data,
+        platforms=MappingProxyType(platforms),
+        quota_specs=MappingProxyType(quota_specs),
+        reset_periods=MappingProxyType(reset_periods),
+        version=version,
+        mtime=mtime
+    )
+
+
+class PlatformCatalog:
+    """
+    Platform catalog loaded from platform_quotas.json.
+    
+    Lookups are dict-indexed by platform id. The file's mtime is checked at
+    most once per check interval and, when it changes, a new snapshot is
+    compiled and swapped in as a whole, so readers never see a half-loaded
+    catalog. Snapshots and the platform dicts they contain must be treated
+    as read-only.
+    """
+    
+    def __init__(self, path: Path = PLATFORM_DATA_PATH, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._next_check = 0.0
+        self._snapshot = self._load(self._get_mtime())
+    
+    def _load(self, mtime: Optional[float]) -> CatalogSnapshot:
+        """Load and compile the catalog file (or the default data)"""
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = json.dumps(DEFAULT_PLATFORM_DATA, sort_keys=True).encode()
+            return compile_catalog(DEFAULT_PLATFORM_DATA, hashlib.sha256(raw).hexdigest())
+        
+        data = json.loads(raw.decode("utf-8"))
+        return compile_catalog(data, hashlib.sha256(raw).hexdigest(), mtime)
+    
+    def _get_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+    
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Current catalog snapshot, reloaded if the data file has changed"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            mtime = self._get_mtime()
+            if mtime is not None and mtime != self._snapshot.mtime:
+                try:
+                    self._snapshot = self._load(mtime)
+                except Exception as e:
+                    # Keep serving the previous catalog if the file is mid-write or
+                    # invalid in any way (e.g. a non-numeric reset_hours)
+                    print(f"Error reloading platform catalog: {e}")
+        return self._snapshot
+    
+    @property
+    def version(self) -> str:
+        """Content hash of the current catalog"""
+        return self.snapshot.version
+    
+    def list_platforms(self) -> List[Dict]:
+        """Get all platforms in catalog order"""
+        return self.snapshot.data.get("platforms", [])
+    
+    def get_platform(self, platform_id: str) -> Optional[Dict]:
+        """Get platform information by ID"""
+        return self.snapshot.platforms.get(platform_id)
+    
+    def get_quota_spec(self, platform_id: str, quota_type: str) -> Optional[Dict]:
+        """Get the catalog entry of a platform's quota type"""
+        specs = self.snapshot.quota_specs.get(platform_id)
+        return specs.get(quota_type) if specs else None
+    
+    def get_reset_period(self, platform_id: str, quota_type: str) -> Optional[timedelta]:
+        """Get the reset window length of a platform's quota type"""
+        periods = self.snapshot.reset_periods.get(platform_id)
+        return periods.get(quota_type) if periods else None
+
+
+# Singleton instance
+platform_catalog = PlatformCatalog()
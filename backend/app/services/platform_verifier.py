@@ -0,0 +1,179 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+import asyncio
+import hashlib
+
+import httpx
+
+from app.config import settings
+from app.services.http_client import http_client
+from app.services.ttl_cache import TTLCache
+
+
+class PlatformProbe(ABC):
+    """
+    Checks an API key against a platform with one cheap authenticated call.
+    
+    Subclasses set default_base_url and must implement build_request (a
+    probe without it can't be instantiated); the base URL can be overridden
+    per platform with the PLATFORM_API_BASE_URLS setting (e.g. to point at
+    a local fake server).
+    """
+    
+    default_base_url = ""
+    
+    def __init__(self, platform_id: str):
+        self.platform_id = platform_id
+    
+    @property
+    def base_url(self) -> str:
+        return settings.platform_api_base_urls.get(self.platform_id, self.default_base_url).rstrip("/")
+    
+    @abstractmethod
+    def build_request(self, api_key: str) -> Tuple[str, Dict]:
+        """URL and request options of the probe call"""
+    
+    async def probe(self, api_key: str) -> Dict:
+        """Verify a key; result has success, message, details and whether it is definitive"""
+        url, options = self.build_request(api_key)
+        try:
+            response = await http_client.get(url, **options)
+        except httpx.HTTPError as e:
+            return self._result(False, f"Platform unreachable: {e.__class__.__name__}", definitive=False)
+        
+        if response.status_code == 200:
+            return self._result(True, "Account verified successfully")
+        if response.status_code in (401, 403):
+            return self._result(False, "API key was rejected by the platform", status_code=response.status_code)
+        return self._result(
+            False,
+            f"Unexpected response from platform ({response.status_code})",
+            definitive=False,
+            status_code=response.status_code
+        )
+    
+    def _result(self, success: bool, message: str, definitive: bool = True, status_code: Optional[int] = None) -> Dict:
+        details = {"platform_id": self.platform_id}
+        if status_code is not None:
+            details["status_code"] = status_code
+        return {"success": success, "message": message, "details": details, "definitive": definitive}
+
+
+class BearerProbe(PlatformProbe):
+    """GET an endpoint with the key as a bearer token"""
+    
+    path = ""
+    
+    def build_request(self, api_key: str) -> Tuple[str, Dict]:
+        return self.base_url + self.path, {"headers": {"Authorization": f"Bearer {api_key}"}}
+
+
+class OpenAIProbe(BearerProbe):
+    default_base_url = "https://api.openai.com"
+    path = "/v1/models"
+
+
+class GeminiProbe(PlatformProbe):
+    default_base_url = "https://generativelanguage.googleapis.com"
+    
+    def build_request(self, api_key: str) -> Tuple[str, Dict]:
+        return self.base_url + "/v1beta/models", {"params": {"key": api_key, "pageSize": 1}}
+
+
+class AnthropicProbe(PlatformProbe):
+    default_base_url = "https://api.anthropic.com"
+    
+    def build_request(self, api_key: str) -> Tuple[str, Dict]:
+        headers = {"x-api-key": api_key, "anthropic-version": "2023-06-01"}
+        return self.base_url + "/v1/models", {"headers": headers}
+
+
+class LeonardoProbe(BearerProbe):
+    default_base_url = "https://cloud.leonardo.ai"
+    path = "/api/rest/v1/me"
+
+
+class HuggingFaceProbe(BearerProbe):
+    default_base_url = "https://huggingface.co"
+    path = "/api/whoami-v2"
+
+
+class CohereProbe(BearerProbe):
+    default_base_url = "https://api.cohere.com"
+    path = "/v1/models"
+
+
+class PlatformVerifier:
+    """
+    Verifies account API keys against their platforms.
+    
+    Probes run concurrently, at most max_concurrency at a time. Definitive
+    results (accepted or rejected key) are cached for cache_ttl seconds per
+    account and key; transient failures are not cached. Platforms without a
+    registered probe only get the stored key checked for being non-empty.
+    """
+    
+    def __init__(self, max_concurrency: int, cache_ttl: float):
+        self.probes: Dict[str, PlatformProbe] = {}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._results = TTLCache(max_entries=10000, ttl_seconds=cache_ttl)
+    
+    def register_probe(self, probe: PlatformProbe):
+        """Register (or replace) the probe of a platform"""
+        self.probes[probe.platform_id] = probe
+    
+    async def verify(self, account_id: int, platform_id: str, api_key: str) -> Dict:
+        """Verify one account's key"""
+        key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        cached = self._results.get((account_id, key_hash))
+        if cached is not None:
+            return dict(cached, account_id=account_id, cached=True)
+        
+        probe = self.probes.get(platform_id)
+        if not api_key:
+            result = {
+                "success": False,
+                "message": "API key is empty or invalid",
+                "details": None,
+                "definitive": True
+            }
+        elif probe is None:
+            result = {
+                "success": True,
+                "message": "Account verified successfully (no platform check available)",
+                "details": {"platform_id": platform_id},
+                "definitive": True
+            }
+        else:
+            async with self._slots:
+                result = await probe.probe(api_key)
+        
+        if result["definitive"]:
+            self._results.set((account_id, key_hash), result)
+        return dict(result, account_id=account_id, cached=False)
+    
+    async def verify_many(self, accounts: Iterable[Tuple[int, str, str]]) -> AsyncIterator[Dict]:
+        """Verify (account_id, platform_id, api_key) tuples in parallel, yielding results as they finish"""
+        tasks = [asyncio.ensure_future(self.verify(*account)) for account in accounts]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+# Singleton instance
+platform_verifier = PlatformVerifier(
+    max_concurrency=settings.verify_max_concurrency,
+    cache_ttl=settings.verify_cache_ttl_seconds
+)
+for _probe in (
+    OpenAIProbe("openai_free"),
+    GeminiProbe("gemini_free"),
+    AnthropicProbe("claude_free"),
+    LeonardoProbe("leonardo_free"),
+    HuggingFaceProbe("huggingface_free"),
+    CohereProbe("cohere_free")
+):
+    platform_verifier.register_probe(_probe)
@@ -1,34 +1,34 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.platform_account import PlatformAccount
 from app.models.quota import Quota
+from app.services.platform_catalog import platform_catalog
 from app.services.quota_tracker import quota_tracker
+from app.services.schedule_solver import schedule_solver
+from app.services.usage_rate import usage_rate_estimator
 
 
 class QuotaOptimizer:
     """Service for optimizing quota usage and generating recommendations"""
     
-    def calculate_urgency_score(self, quota_info: Dict) -> float:
-        """
-        Calculate urgency score based on:
-        1. Time until reset (shorter = higher priority)
-        2. Remaining quota (more remaining = higher priority)
-        3. Current usage rate
-        """
-        now = datetime.utcnow()
-        reset_at = quota_info["reset_at"]
-        
+    # Decayed recent usage, in units, below which a usage rate is too little
+    # history to plan a schedule on
+    MIN_RECENT_USAGE = 10.0
+    
+    def _parse_reset_at(self, reset_at) -> datetime:
+        """Reset time as a naive UTC datetime"""
         if isinstance(reset_at, str):
             reset_at = datetime.fromisoformat(reset_at.replace('Z', '+00:00'))
-        
-        time_until_reset = (reset_at - now).total_seconds() / 3600  # hours
-        remaining_quota = quota_info["remaining_quota"]
-        total_quota = quota_info["total_quota"]
-        
+        if reset_at.tzinfo is not None:
+            reset_at = reset_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return reset_at
+    
+    def _urgency(self, remaining_quota: float, total_quota: float, hours_until_reset: float) -> float:
+        """Urgency score (0-100) of a single quota"""
         # Avoid division by zero
-        if time_until_reset <= 0:
+        if hours_until_reset <= 0:
             return 0.0
         
         if total_quota <= 0:
@@ -38,75 +38,102 @@ class QuotaOptimizer:
         # - Less time until reset
         # - More remaining quota
         remaining_percentage = remaining_quota / total_quota
-        time_factor = max(0, 1 - (time_until_reset / 24))  # Normalize to 0-1
+        time_factor = max(0, 1 - (hours_until_reset / 24))  # Normalize to 0-1
         
         urgency_score = (remaining_percentage * 0.6) + (time_factor * 0.4)
         
         return round(urgency_score * 100, 2)
     
-    def predict_waste(self, quota_info: Dict, usage_history: List[Dict]) -> bool:
-        """Predict if quota will be wasted based on current usage rate"""
-        if not usage_history:
-            return False
+    def calculate_urgency_score(self, quota_info: Dict, now: Optional[datetime] = None) -> float:
+        """
+        Calculate urgency score based on:
+        1. Time until reset (shorter = higher priority)
+        2. Remaining quota (more remaining = higher priority)
+        3. Current usage rate
+        """
+        now = now or datetime.utcnow()
+        reset_at = self._parse_reset_at(quota_info["reset_at"])
         
-        remaining = quota_info["remaining_quota"]
-        time_until_reset = (quota_info["reset_at"] - datetime.utcnow()).total_seconds() / 3600
+        return self._urgency(
+            quota_info["remaining_quota"],
+            quota_info["total_quota"],
+            (reset_at - now).total_seconds() / 3600
+        )
+    
+    def score_quotas(self, quotas_by_account: Dict[int, List[Dict]], now: Optional[datetime] = None) -> Dict[int, Dict]:
+        """
+        Score every quota of many accounts (one user's or all users') at once.
         
-        if time_until_reset <= 0:
-            return False
+        The quotas are flattened into columns and scored in a single pass
+        against one `now`, parsing each reset time once. Returns, per account,
+        the per-quota scores, their average, and the index and entry of the
+        most urgent quota (the first one on ties).
+        """
+        now = now or datetime.utcnow()
         
-        # Calculate average usage rate (simple approach)
-        if len(usage_history) >= 2:
-            recent_usage = sum(log.get("amount", 0) for log in usage_history[-10:])
-            hours_tracked = len(usage_history[-10:])
-            avg_rate = recent_usage / max(hours_tracked, 1)
-            
-            predicted_usage = avg_rate * time_until_reset
-            
-            # If predicted usage is less than 50% of remaining, flag as potential waste
-            if predicted_usage < (remaining * 0.5):
-                return True
+        owners = []
+        remaining = []
+        totals = []
+        hours_until_reset = []
+        for account_id, quotas in quotas_by_account.items():
+            for quota in quotas:
+                owners.append(account_id)
+                remaining.append(quota["remaining_quota"])
+                totals.append(quota["total_quota"])
+                hours_until_reset.append(
+                    (self._parse_reset_at(quota["reset_at"]) - now).total_seconds() / 3600
+                )
+        
+        scores = list(map(self._urgency, remaining, totals, hours_until_reset))
+        
+        results = {
+            account_id: {"scores": [], "average": 0.0, "most_urgent_index": None, "most_urgent": None}
+            for account_id in quotas_by_account
+        }
+        for account_id, score in zip(owners, scores):
+            results[account_id]["scores"].append(score)
         
-        return False
-    
-    async def get_recommendations(self, db: AsyncSession, user_id: int) -> Dict:
-        """Get platform recommendations for optimal quota usage"""
-        # Get all user's accounts
-        result = await db.execute(
-            select(PlatformAccount).where(PlatformAccount.user_id == user_id)
-        )
-        accounts = result.scalars().all()
+        for account_id, result in results.items():
+            account_scores = result["scores"]
+            if not account_scores:
+                continue
+            best = max(range(len(account_scores)), key=account_scores.__getitem__)
+            result["average"] = sum(account_scores) / len(account_scores)
+            result["most_urgent_index"] = best
+            result["most_urgent"] = quotas_by_account[account_id][best]
         
-        if not accounts:
-            return {
-                "recommended_platform": None,
-                "reason": "No connected accounts found. Please connect your AI platform accounts first.",
-                "alternatives": []
-            }
+        return results
+    
+    def build_platform_scores(self, accounts: List[PlatformAccount], quotas_by_account: Dict[int, List[Dict]], now: Optional[datetime] = None) -> List[Dict]:
+        """Build the scored platform entry of each account, in account order"""
+        now = now or datetime.utcnow()
+        scores_by_account = self.score_quotas(quotas_by_account, now)
         
-        # Collect quota info for all accounts
         platform_scores = []
-        
         for account in accounts:
-            quotas = await quota_tracker.get_quota_status(db, account.id)
-            if not quotas:
-                continue
-            
             platform_info = quota_tracker.get_platform_info(account.platform_id)
             if not platform_info:
                 continue
             
-            # Calculate average urgency across all quotas
-            urgency_scores = []
-            for quota in quotas:
-                score = self.calculate_urgency_score(quota)
-                urgency_scores.append(score)
-            
-            avg_urgency = sum(urgency_scores) / len(urgency_scores) if urgency_scores else 0
+            # Copy the quotas so cached status entries are never modified
+            quotas = [
+                {**quota, **usage_rate_estimator.predict(account.id, quota, now)}
+                for quota in quotas_by_account.get(account.id, [])
+            ]
+            scores = scores_by_account.get(account.id)
             
-            # Find the most urgent quota
-            most_urgent_quota = max(quotas, key=lambda q: self.calculate_urgency_score(q))
-            time_until_reset = (most_urgent_quota["reset_at"] - datetime.utcnow())
+            if quotas:
+                avg_urgency = scores["average"]
+                most_urgent_quota = quotas[scores["most_urgent_index"]]
+                time_until_reset = self._format_timedelta(
+                    self._parse_reset_at(most_urgent_quota["reset_at"]) - now
+                )
+                recommendation = "Use now" if avg_urgency > 70 else "Available" if avg_urgency > 30 else "Low priority"
+            else:
+                avg_urgency = 0
+                most_urgent_quota = None
+                time_until_reset = "N/A"
+                recommendation = "No quota data"
             
             platform_scores.append({
                 "platform_id": account.platform_id,
@@ -114,10 +141,54 @@ class QuotaOptimizer:
                 "account_id": account.id,
                 "quotas": quotas,
                 "urgency_score": avg_urgency,
-                "time_until_reset": self._format_timedelta(time_until_reset),
+                "recommendation": recommendation,
+                "time_until_reset": time_until_reset,
                 "most_urgent_quota": most_urgent_quota
             })
         
+        return platform_scores
+    
+    def predict_waste(self, quota_info: Dict, account_id: int, now: Optional[datetime] = None) -> bool:
+        """Predict if quota will be wasted based on the account's current usage rate"""
+        now = now or datetime.utcnow()
+        remaining = quota_info["remaining_quota"]
+        
+        if remaining <= 0 or quota_info["reset_at"] <= now:
+            return False
+        
+        # If predicted usage is less than 50% of remaining, flag as potential waste
+        prediction = usage_rate_estimator.predict(account_id, quota_info, now)
+        return prediction["predicted_waste"] > remaining * 0.5
+    
+    async def get_recommendations(self, db: AsyncSession, user_id: int) -> Dict:
+        """Get platform recommendations for optimal quota usage"""
+        # Get all user's accounts
+        result = await db.execute(
+            select(PlatformAccount).where(PlatformAccount.user_id == user_id)
+        )
+        accounts = result.scalars().all()
+        
+        # Collect quota info for all accounts
+        quotas_by_account = await quota_tracker.get_quota_status_many(
+            db, [account.id for account in accounts]
+        )
+        
+        return self.rank_recommendations(accounts, quotas_by_account)
+    
+    def rank_recommendations(self, accounts: List[PlatformAccount], quotas_by_account: Dict[int, List[Dict]], now: Optional[datetime] = None) -> Dict:
+        """Rank already-loaded accounts and quota status into recommendations"""
+        if not accounts:
+            return {
+                "recommended_platform": None,
+                "reason": "No connected accounts found. Please connect your AI platform accounts first.",
+                "alternatives": []
+            }
+        
+        platform_scores = [
+            platform for platform in self.build_platform_scores(accounts, quotas_by_account, now)
+            if platform["quotas"]
+        ]
+        
         # Sort by urgency score
         platform_scores.sort(key=lambda x: x["urgency_score"], reverse=True)
         
@@ -178,35 +249,81 @@ class QuotaOptimizer:
         else:
             return f"{minutes} minute{'s' if minutes != 1 else ''}"
     
-    async def generate_daily_schedule(self, db: AsyncSession, user_id: int) -> List[Dict]:
+    async def generate_daily_schedule(self, db: AsyncSession, user_id: int, timezone_name: str = "UTC") -> List[Dict]:
         """Generate optimal daily usage schedule"""
-        recommendations = await self.get_recommendations(db, user_id)
+        result = await db.execute(
+            select(PlatformAccount).where(PlatformAccount.user_id == user_id)
+        )
+        accounts = result.scalars().all()
+        quotas_by_account = await quota_tracker.get_quota_status_many(
+            db, [account.id for account in accounts]
+        )
         
-        schedule = []
-        platforms = [recommendations.get("recommended_platform")]
-        platforms.extend(recommendations.get("alternatives", []))
-        platforms = [p for p in platforms if p is not None]
-        
-        # Distribute platforms across the day
-        time_slots = [
-            "Morning (6-9 AM)",
-            "Late Morning (9-12 PM)",
-            "Afternoon (12-3 PM)",
-            "Late Afternoon (3-6 PM)",
-            "Evening (6-9 PM)",
-            "Night (9-12 AM)"
-        ]
+        return self.build_daily_schedule(accounts, quotas_by_account, timezone_name)
+    
+    def build_daily_schedule(
+        self,
+        accounts: List[PlatformAccount],
+        quotas_by_account: Dict[int, List[Dict]],
+        timezone_name: str = "UTC",
+        now: Optional[datetime] = None
+    ) -> List[Dict]:
+        """
+        Plan the day's usage over the user's local 3-hour slots.
+        
+        Accounts are planned in groups counting the same unit (messages,
+        tokens, requests), since only those can stand in for each other.
+        A group's expected demand is the combined current usage rate of its
+        accounts; with too little usage history to tell (under
+        MIN_RECENT_USAGE), its accounts are planned up to their full
+        capacity.
+        """
+        now = now or datetime.utcnow()
+        slots = schedule_solver.build_slots(now, timezone_name)
         
-        for i, platform in enumerate(platforms[:len(time_slots)]):
+        accounts_by_unit = {}
+        for account in accounts:
+            accounts_by_unit.setdefault(self._account_unit(account, quotas_by_account), []).append(account)
+        
+        allocations = []
+        for unit_accounts in accounts_by_unit.values():
+            demand_per_hour = sum(usage_rate_estimator.get_rate(account.id, now) for account in unit_accounts)
+            # The rate is recent usage / tau, so this is the usage it was built from
+            if demand_per_hour * usage_rate_estimator.tau_hours < self.MIN_RECENT_USAGE:
+                demand_per_hour = None
+            allocations.extend(schedule_solver.solve(unit_accounts, quotas_by_account, slots, demand_per_hour))
+        # Each group's allocations are in slot order; merge them (stable)
+        allocations.sort(key=lambda allocation: allocation["starts_at"])
+        
+        schedule = []
+        for allocation in allocations:
+            account = allocation["account"]
+            platform_info = quota_tracker.get_platform_info(account.platform_id)
+            if not platform_info:
+                continue
+            
+            quota_spec = platform_catalog.get_quota_spec(account.platform_id, allocation["quota_type"]) or {}
+            unit = quota_spec.get("unit", "requests")
+            
             schedule.append({
-                "time_slot": time_slots[i],
-                "platform_id": platform["platform_id"],
-                "platform_name": platform["platform_name"],
-                "action": "Use available quota",
-                "reason": f"Urgency score: {platform['urgency_score']:.0f}"
+                "time_slot": allocation["time_slot"],
+                "platform_id": account.platform_id,
+                "platform_name": platform_info["name"],
+                "account_id": account.id,
+                "amount": allocation["amount"],
+                "starts_at": allocation["starts_at"],
+                "action": f"Use up to {allocation['amount']:g} {unit}",
+                "reason": f"{allocation['quota_type']} quota resets in {self._format_timedelta(allocation['expires_at'] - now)}"
             })
         
         return schedule
+    
+    def _account_unit(self, account: PlatformAccount, quotas_by_account: Dict[int, List[Dict]]) -> str:
+        """The unit an account's quotas count, from its first quota"""
+        for quota in quotas_by_account.get(account.id, []):
+            quota_spec = platform_catalog.get_quota_spec(account.platform_id, quota["quota_type"]) or {}
+            return quota_spec.get("unit", "requests")
+        return "requests"
 
 
 # Singleton instance
@@ -0,0 +1,59 @@
+from typing import Dict, Optional, Set
+import asyncio
+
+
+class QuotaSubscription:
+    """One open stream: the accounts whose quotas changed since its last push"""
+    
+    def __init__(self):
+        self.changed_accounts: Set[int] = set()
+        self.full_refresh = False
+        self.changed = asyncio.Event()
+    
+    def take_changes(self):
+        """Return and reset (full_refresh, changed account ids)"""
+        full_refresh, accounts = self.full_refresh, self.changed_accounts
+        self.full_refresh = False
+        self.changed_accounts = set()
+        self.changed.clear()
+        return full_refresh, accounts
+
+
+class QuotaStreamHub:
+    """
+    Fans quota change notifications out to each user's open streams.
+    
+    Notifications only mark accounts as changed; each stream builds and sends
+    the current status itself when it next wakes up, so a burst of usage on
+    an account results in a single push. Notifying a user without open
+    streams costs one dict lookup.
+    """
+    
+    def __init__(self):
+        self._subscriptions: Dict[int, Set[QuotaSubscription]] = {}
+    
+    def subscribe(self, user_id: int) -> QuotaSubscription:
+        subscription = QuotaSubscription()
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, user_id: int, subscription: QuotaSubscription):
+        subscriptions = self._subscriptions.get(user_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[user_id]
+    
+    def notify(self, user_id: int, account_id: Optional[int] = None):
+        """Mark an account's quotas as changed, or all of the user's accounts if account_id is None"""
+        for subscription in self._subscriptions.get(user_id, ()):
+            if account_id is None:
+                subscription.full_refresh = True
+            else:
+                subscription.changed_accounts.add(account_id)
+            subscription.changed.set()
+
+
+# Singleton instance
+quota_stream_hub = QuotaStreamHub()
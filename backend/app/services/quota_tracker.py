@@ -1,79 +1,27 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, case
 from app.models.quota import Quota
 from app.models.platform_account import PlatformAccount
-import json
+from app.services.platform_catalog import platform_catalog
 
 
 class QuotaTracker:
     """Service for tracking and updating quota usage"""
     
     def __init__(self):
-        self.platform_data = self._load_platform_data()
+        # Usage recorded but not yet flushed to the database, by account id
+        self.pending_usage: Dict[int, float] = {}
     
-    def _load_platform_data(self) -> Dict:
-        """Load platform quota information"""
-        try:
-            with open("/app/app/data/platform_quotas.json", "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            # Return default data if file doesn't exist
-            return {
-                "platforms": [
-                    {
-                        "id": "openai_free",
-                        "name": "ChatGPT Free",
-                        "quotas": [
-                            {"type": "3hour", "limit": 50, "reset_hours": 3, "unit": "messages"}
-                        ]
-                    },
-                    {
-                        "id": "gemini_free",
-                        "name": "Gemini Free",
-                        "quotas": [
-                            {"type": "minute", "limit": 60, "reset_hours": 0.0166, "unit": "requests"},
-                            {"type": "daily", "limit": 1500, "reset_hours": 24, "unit": "requests"}
-                        ]
-                    },
-                    {
-                        "id": "claude_free",
-                        "name": "Claude Free",
-                        "quotas": [
-                            {"type": "daily", "limit": 30, "reset_hours": 24, "unit": "messages"}
-                        ]
-                    },
-                    {
-                        "id": "leonardo_free",
-                        "name": "Leonardo AI Free",
-                        "quotas": [
-                            {"type": "daily", "limit": 150, "reset_hours": 24, "unit": "tokens"}
-                        ]
-                    },
-                    {
-                        "id": "huggingface_free",
-                        "name": "Hugging Face Free",
-                        "quotas": [
-                            {"type": "monthly", "limit": 1000, "reset_hours": 720, "unit": "requests"}
-                        ]
-                    },
-                    {
-                        "id": "cohere_free",
-                        "name": "Cohere Free",
-                        "quotas": [
-                            {"type": "monthly", "limit": 1000, "reset_hours": 720, "unit": "calls"}
-                        ]
-                    }
-                ]
-            }
+    @property
+    def platform_data(self) -> Dict:
+        """Raw platform quota information"""
+        return platform_catalog.snapshot.data
     
     def get_platform_info(self, platform_id: str) -> Optional[Dict]:
         """Get platform information by ID"""
-        for platform in self.platform_data.get("platforms", []):
-            if platform["id"] == platform_id:
-                return platform
-        return None
+        return platform_catalog.get_platform(platform_id)
     
     async def initialize_quotas(self, db: AsyncSession, account_id: int, platform_id: str):
         """Initialize quota records for a new account"""
@@ -81,84 +29,229 @@ class QuotaTracker:
         if not platform_info:
             return
         
-        for quota_info in platform_info.get("quotas", []):
-            reset_at = datetime.utcnow() + timedelta(hours=quota_info["reset_hours"])
-            quota = Quota(
-                account_id=account_id,
-                quota_type=quota_info["type"],
-                total_quota=float(quota_info["limit"]),
-                used_quota=0.0,
-                reset_at=reset_at
-            )
-            db.add(quota)
+        for values in self.initial_quota_values(account_id, platform_id, datetime.utcnow()):
+            db.add(Quota(**values))
         
         await db.commit()
     
-    async def update_usage(self, db: AsyncSession, account_id: int, amount: float):
-        """Update quota usage for an account"""
-        result = await db.execute(
-            select(Quota).where(Quota.account_id == account_id)
-        )
-        quotas = result.scalars().all()
+    def initial_quota_values(self, account_id: int, platform_id: str, now: datetime) -> List[Dict]:
+        """Column values of a new account's quota rows, for bulk inserts"""
+        platform_info = self.get_platform_info(platform_id) or {}
+        return [
+            {
+                "account_id": account_id,
+                "quota_type": quota_info["type"],
+                "total_quota": float(quota_info["limit"]),
+                "used_quota": 0.0,
+                "reset_at": now + platform_catalog.get_reset_period(platform_id, quota_info["type"])
+            }
+            for quota_info in platform_info.get("quotas", [])
+        ]
+    
+    def _effective_window(
+        self,
+        used_quota: float,
+        reset_at: datetime,
+        period: Optional[timedelta],
+        now: datetime
+    ) -> Tuple[float, datetime]:
+        """
+        Compute the effective usage and next reset time of a quota.
         
-        for quota in quotas:
-            # Check if quota needs reset
-            if datetime.utcnow() >= quota.reset_at:
-                await self.reset_quota(db, quota)
-            
-            # Update usage
-            quota.used_quota += amount
+        The stored reset_at is the anchor of the window in which used_quota
+        was accumulated. Once it has passed, the quota is in a later window
+        (aligned to the anchor) with nothing used yet, so resets never need
+        to be written back to the database.
+        """
+        if now < reset_at or not period or period <= timedelta(0):
+            return used_quota, reset_at
         
-        await db.commit()
+        elapsed_windows = (now - reset_at) // period + 1
+        return 0.0, reset_at + elapsed_windows * period
     
-    async def reset_quota(self, db: AsyncSession, quota: Quota):
-        """Reset quota to initial values"""
-        result = await db.execute(
-            select(PlatformAccount).where(PlatformAccount.id == quota.account_id)
+    def build_status(self, quota_type: str, total_quota: float, used_quota: float, reset_at: datetime) -> Dict:
+        """Build the status entry reported for a quota"""
+        remaining = max(0, total_quota - used_quota)
+        percentage = (used_quota / total_quota * 100) if total_quota > 0 else 0
+        
+        return {
+            "quota_type": quota_type,
+            "total_quota": total_quota,
+            "used_quota": used_quota,
+            "remaining_quota": remaining,
+            "reset_at": reset_at,
+            "usage_percentage": round(percentage, 2)
+        }
+    
+    async def apply_usage(
+        self,
+        db: AsyncSession,
+        account_id: int,
+        amount: float,
+        usage: Optional[List[Tuple[datetime, float]]] = None
+    ) -> List[Dict]:
+        """
+        Add usage to every quota of an account without committing.
+        
+        The increment happens inside a single UPDATE ... RETURNING, so
+        concurrent callers never lose each other's usage. Quotas whose window
+        had already expired are rolled over by the same statement: their next
+        reset time is computed up front, and the CASE on reset_at only picks
+        it if no concurrent writer has rolled the quota in the meantime.
+        
+        usage, if given, lists the (timestamp, amount) events that make up
+        amount. Events from before a quota's current window started (e.g.
+        reported late, after a reset) don't count towards that quota.
+        """
+        now = datetime.utcnow()
+        
+        query = (
+            select(Quota.id, Quota.quota_type, Quota.reset_at, PlatformAccount.platform_id)
+            .join(PlatformAccount, Quota.account_id == PlatformAccount.id)
+            .where(Quota.account_id == account_id)
         )
-        account = result.scalar_one_or_none()
-        if not account:
-            return
+        if usage is None:
+            # Only expired quotas need anything computed up front
+            query = query.where(Quota.reset_at <= now)
+        result = await db.execute(query)
         
-        platform_info = self.get_platform_info(account.platform_id)
-        if not platform_info:
-            return
+        next_resets = {}
+        amounts = {}
+        for quota_id, quota_type, reset_at, platform_id in result.all():
+            period = platform_catalog.get_reset_period(platform_id, quota_type)
+            _, next_reset_at = self._effective_window(0.0, reset_at, period, now)
+            if next_reset_at != reset_at:
+                next_resets[quota_id] = next_reset_at
+            if usage is not None and period:
+                window_start = next_reset_at - period
+                amounts[quota_id] = sum(used for timestamp, used in usage if timestamp >= window_start)
+        
+        added = amount
+        if any(quota_amount != amount for quota_amount in amounts.values()):
+            added = case(amounts, value=Quota.id, else_=amount)
         
-        for quota_info in platform_info.get("quotas", []):
-            if quota_info["type"] == quota.quota_type:
-                quota.used_quota = 0.0
-                quota.reset_at = datetime.utcnow() + timedelta(hours=quota_info["reset_hours"])
-                break
+        values = {"used_quota": Quota.used_quota + added}
+        if next_resets:
+            in_window = Quota.reset_at > now
+            values = {
+                "used_quota": case(
+                    (in_window, Quota.used_quota + added),
+                    (Quota.id.in_(list(next_resets)), added),
+                    else_=Quota.used_quota + added
+                ),
+                "reset_at": case(
+                    (in_window, Quota.reset_at),
+                    else_=case(next_resets, value=Quota.id, else_=Quota.reset_at)
+                )
+            }
         
+        result = await db.execute(
+            update(Quota)
+            .where(Quota.account_id == account_id)
+            .values(**values)
+            .returning(Quota.quota_type, Quota.total_quota, Quota.used_quota, Quota.reset_at)
+        )
+        
+        return [
+            self.build_status(quota_type, total_quota, used_quota, reset_at)
+            for quota_type, total_quota, used_quota, reset_at in result.all()
+        ]
+    
+    async def update_usage(self, db: AsyncSession, account_id: int, amount: float) -> List[Dict]:
+        """Update quota usage for an account"""
+        status = await self.apply_usage(db, account_id, amount)
         await db.commit()
+        return status
     
     async def get_quota_status(self, db: AsyncSession, account_id: int) -> List[Dict]:
         """Get current quota status for an account"""
+        status_by_account = await self.get_quota_status_many(db, [account_id])
+        return status_by_account.get(account_id, [])
+    
+    async def get_quota_status_many(
+        self,
+        db: AsyncSession,
+        account_ids: List[int],
+        include_pending: bool = True
+    ) -> Dict[int, List[Dict]]:
+        """
+        Get current quota status for several accounts at once.
+        
+        Loads every quota with its account's platform in a single joined
+        query. Expired windows are resolved arithmetically, so this is a pure
+        read and never takes a write lock. Buffered usage that hasn't been
+        flushed yet is included unless include_pending is False.
+        """
+        status_by_account: Dict[int, List[Dict]] = {account_id: [] for account_id in account_ids}
+        if not account_ids:
+            return status_by_account
+        
         result = await db.execute(
-            select(Quota).where(Quota.account_id == account_id)
+            select(Quota, PlatformAccount.platform_id)
+            .join(PlatformAccount, Quota.account_id == PlatformAccount.id)
+            .where(Quota.account_id.in_(account_ids))
+            .order_by(Quota.account_id, Quota.id)
         )
-        quotas = result.scalars().all()
         
-        status = []
-        for quota in quotas:
-            # Auto-reset if needed
-            if datetime.utcnow() >= quota.reset_at:
-                await self.reset_quota(db, quota)
-            
-            remaining = max(0, quota.total_quota - quota.used_quota)
-            percentage = (quota.used_quota / quota.total_quota * 100) if quota.total_quota > 0 else 0
+        now = datetime.utcnow()
+        for quota, platform_id in result.all():
+            used_quota, reset_at = self._effective_window(
+                quota.used_quota,
+                quota.reset_at,
+                platform_catalog.get_reset_period(platform_id, quota.quota_type),
+                now
+            )
+            if include_pending:
+                used_quota += self.pending_usage.get(quota.account_id, 0.0)
             
-            status.append({
-                "quota_type": quota.quota_type,
-                "total_quota": quota.total_quota,
-                "used_quota": quota.used_quota,
-                "remaining_quota": remaining,
-                "reset_at": quota.reset_at,
-                "usage_percentage": round(percentage, 2)
-            })
+            status_by_account[quota.account_id].append(
+                self.build_status(quota.quota_type, quota.total_quota, used_quota, reset_at)
+            )
         
-        return status
-
+        return status_by_account
+    
+    def current_status(
+        self,
+        status_by_account: Dict[int, List[Dict]],
+        platform_ids: Dict[int, str],
+        now: Optional[datetime] = None
+    ) -> Dict[int, List[Dict]]:
+        """
+        Bring quota status loaded earlier without buffered usage up to date
+        (copies, never modifies): windows that have reset since are emptied,
+        the same way get_quota_status_many resolves them, and buffered usage
+        is added.
+        """
+        now = now or datetime.utcnow()
+        result = {}
+        for account_id, quotas in status_by_account.items():
+            pending = self.pending_usage.get(account_id, 0.0)
+            if not pending and all(now < quota["reset_at"] for quota in quotas):
+                result[account_id] = quotas
+                continue
+            
+            current = []
+            for quota in quotas:
+                used_quota, reset_at = self._effective_window(
+                    quota["used_quota"],
+                    quota["reset_at"],
+                    platform_catalog.get_reset_period(platform_ids[account_id], quota["quota_type"]),
+                    now
+                )
+                current.append(
+                    self.build_status(quota["quota_type"], quota["total_quota"], used_quota + pending, reset_at)
+                )
+            result[account_id] = current
+        return result
+    
+    def has_capacity(self, quotas: List[Dict], amount: float, now: Optional[datetime] = None) -> bool:
+        """Whether every quota has at least amount remaining (expired windows count as full)"""
+        now = now or datetime.utcnow()
+        for quota in quotas:
+            remaining = quota["total_quota"] if quota["reset_at"] <= now else quota["remaining_quota"]
+            if remaining < amount:
+                return False
+        return True
 
 # Singleton instance
 quota_tracker = QuotaTracker()
@@ -0,0 +1,135 @@
+from collections import deque
+from datetime import timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+import math
+import time
+
+from app.services.platform_catalog import platform_catalog
+
+
+class RateLimiter:
+    """
+    In-memory sliding-window limiter for short quotas (e.g. 60 per minute).
+    
+    The quota rows in the database reset in fixed windows when read, which
+    lets a burst straddling a reset use twice the limit and is far too slow
+    to consult per request. For every catalog quota whose period is shorter
+    than max_window, this keeps a log of the last window's usage per
+    (account, quota type) and admits a request only if the usage within the
+    trailing window, including it, stays within the limit.
+    
+    An amount larger than a limit can never be admitted; check and acquire
+    report it with a retry_after of math.inf rather than a wait.
+    
+    Time is taken from the monotonic clock. State is local to the process.
+    """
+    
+    def __init__(self, max_window: timedelta = timedelta(hours=1)):
+        self.max_window = max_window
+        # (account_id, quota_type) -> (log of (time, amount), running total)
+        self._logs: Dict[Tuple[int, str], List] = {}
+        # Short quotas per platform as (quota_type, limit, window seconds)
+        self._limits: Dict[str, List[Tuple[str, float, float]]] = {}
+        self._catalog_version: Optional[str] = None
+    
+    def get_limits(self, platform_id: str) -> List[Tuple[str, float, float]]:
+        """The sliding-window quotas of a platform"""
+        version = platform_catalog.version
+        if version != self._catalog_version:
+            self._limits = {}
+            self._catalog_version = version
+        
+        limits = self._limits.get(platform_id)
+        if limits is None:
+            limits = []
+            platform_info = platform_catalog.get_platform(platform_id) or {}
+            for quota_info in platform_info.get("quotas", []):
+                period = platform_catalog.get_reset_period(platform_id, quota_info["type"])
+                if period is not None and timedelta(0) < period < self.max_window:
+                    limits.append((quota_info["type"], float(quota_info["limit"]), period.total_seconds()))
+            self._limits[platform_id] = limits
+        return limits
+    
+    def _get_log(self, account_id: int, quota_type: str, window: float, now: float) -> List:
+        """The usage log of a quota with entries older than the window dropped"""
+        log = self._logs.get((account_id, quota_type))
+        if log is None:
+            log = [deque(), 0.0]
+            self._logs[(account_id, quota_type)] = log
+        
+        entries: Deque[Tuple[float, float]] = log[0]
+        while entries and entries[0][0] <= now - window:
+            log[1] -= entries.popleft()[1]
+        if not entries:
+            log[1] = 0.0
+        return log
+    
+    def _retry_after(self, log: List, limit: float, window: float, amount: float, now: float) -> float:
+        """Seconds until amount fits in the window (0 if it fits now, inf if it never will)"""
+        excess = log[1] + amount - limit
+        if excess <= 1e-9:
+            return 0.0
+        if amount > limit:
+            return math.inf
+        
+        for timestamp, used in log[0]:
+            excess -= used
+            if excess <= 1e-9:
+                return max(0.0, timestamp + window - now)
+        return window
+    
+    def check(self, account_id: int, platform_id: str, amount: float = 1.0) -> Tuple[bool, float]:
+        """Whether amount can be used now, and if not, in how many seconds"""
+        now = time.monotonic()
+        retry_after = 0.0
+        for quota_type, limit, window in self.get_limits(platform_id):
+            log = self._get_log(account_id, quota_type, window, now)
+            retry_after = max(retry_after, self._retry_after(log, limit, window, amount, now))
+        return retry_after == 0.0, retry_after
+    
+    def acquire(self, account_id: int, platform_id: str, amount: float = 1.0) -> Tuple[bool, float]:
+        """Like check, but also records the usage when it is allowed"""
+        now = time.monotonic()
+        limits = self.get_limits(platform_id)
+        logs = []
+        retry_after = 0.0
+        for quota_type, limit, window in limits:
+            log = self._get_log(account_id, quota_type, window, now)
+            logs.append(log)
+            retry_after = max(retry_after, self._retry_after(log, limit, window, amount, now))
+        
+        if retry_after > 0:
+            return False, retry_after
+        
+        for log in logs:
+            log[0].append((now, amount))
+            log[1] += amount
+        return True, 0.0
+    
+    def record(self, account_id: int, platform_id: str, amount: float, age_seconds: float = 0.0):
+        """
+        Record usage that already happened (e.g. reported by a client) without
+        checking the limits; age_seconds is how long ago it happened.
+        """
+        now = time.monotonic()
+        at = now - max(0.0, age_seconds)
+        for quota_type, _, window in self.get_limits(platform_id):
+            if at <= now - window:
+                continue
+            log = self._get_log(account_id, quota_type, window, now)
+            # Keep the log in time order; late reports are rare and recent
+            entries: Deque[Tuple[float, float]] = log[0]
+            index = len(entries)
+            while index > 0 and entries[index - 1][0] > at:
+                index -= 1
+            entries.insert(index, (at, amount))
+            log[1] += amount
+    
+    def forget(self, account_id: int):
+        """Drop the state of a deleted account"""
+        for key in [key for key in self._logs if key[0] == account_id]:
+            del self._logs[key]
+
+
+# Singleton instance
+rate_limiter = RateLimiter()
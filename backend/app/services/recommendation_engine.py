@@ -0,0 +1,223 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import heapq
+
+from app.database import async_session_maker
+from app.models.platform_account import PlatformAccount
+from app.services.etags import user_versions
+from app.services.quota_optimizer import quota_optimizer
+from app.services.quota_stream import quota_stream_hub
+from app.services.quota_tracker import quota_tracker
+
+
+class RecommendationEngine:
+    """
+    Keeps every user's accounts and quota status in memory so recommendations
+    and schedules can be served without touching the database.
+    
+    Snapshots hold the flushed quota state. current_quotas brings them up to
+    date at read time: windows that have reset since the load are emptied
+    arithmetically and buffered usage from quota_tracker.pending_usage is
+    added, so a snapshot never needs reloading just because time passed.
+    Flushed usage is applied to the snapshot from the quota status the
+    write returned (apply_flushed_usage); only account changes drop a
+    snapshot, to be reloaded on the next read. Ranking itself runs at read
+    time against the current time, so results are identical to
+    QuotaOptimizer.get_recommendations.
+    
+    A background task only tracks when a quota with usage resets, to tell
+    live quota streams and ETags about it. Reset times go on a min-heap
+    from three places: snapshot loads, recorded usage (while the user's
+    snapshot is loaded) and the quota status written by each usage flush,
+    so usage is covered whether or not a snapshot was loaded at the time.
+    Quotas that are unused, like an idle per-minute window, never wake it.
+    
+    Snapshots are local to the process; with several workers, each keeps its
+    own copy and only sees the flushes and invalidations it performs.
+    """
+    
+    # Users loaded per query when warming up or reloading
+    BATCH_SIZE = 500
+    
+    def __init__(self):
+        self._snapshots: Dict[int, Dict] = {}
+        # Bumped on every invalidation, so loads that raced one are discarded
+        self._versions: Dict[int, int] = {}
+        self._resets: List[Tuple[datetime, int]] = []
+        # (user_id, reset_at) of the entries in the heap, to skip duplicates
+        self._scheduled: Set[Tuple[int, datetime]] = set()
+        # Created by start(), so it belongs to the event loop of the watcher
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background reset watcher and warm every user's snapshot"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background task"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+    
+    def invalidate(self, user_id: int):
+        """Drop a user's snapshot after their accounts changed"""
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        self._snapshots.pop(user_id, None)
+    
+    def apply_flushed_usage(self, user_id: int, status_by_account: Dict[int, List[Dict]]):
+        """
+        Bring a user's snapshot up to date with the quota status a usage
+        flush wrote (as returned by QuotaTracker.apply_usage), and queue the
+        resets of the quotas that now have usage.
+        """
+        # A load that read the database before the write would be stale
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is not None:
+            quotas_by_account = dict(snapshot["quotas_by_account"])
+            for account_id, quotas in status_by_account.items():
+                current = quotas_by_account.get(account_id)
+                if current is None:
+                    # An account the snapshot doesn't know about; load it afresh
+                    self._snapshots.pop(user_id, None)
+                    break
+                written = {quota["quota_type"]: quota for quota in quotas}
+                quotas_by_account[account_id] = [written.get(quota["quota_type"], quota) for quota in current]
+            else:
+                # Replaced rather than modified, so readers holding the old one are unaffected
+                self._snapshots[user_id] = dict(snapshot, quotas_by_account=quotas_by_account)
+        
+        for quotas in status_by_account.values():
+            self.schedule_resets(user_id, quotas)
+    
+    async def get_recommendations(self, db: AsyncSession, user_id: int) -> Dict:
+        """Recommendations for a user, from the in-memory snapshot"""
+        snapshot = await self.get_snapshot(db, user_id)
+        return quota_optimizer.rank_recommendations(snapshot["accounts"], self.current_quotas(snapshot))
+    
+    async def get_daily_schedule(self, db: AsyncSession, user_id: int, timezone_name: str = "UTC") -> List[Dict]:
+        """Daily usage schedule for a user, from the in-memory snapshot"""
+        snapshot = await self.get_snapshot(db, user_id)
+        return quota_optimizer.build_daily_schedule(snapshot["accounts"], self.current_quotas(snapshot), timezone_name)
+    
+    def current_quotas(self, snapshot: Dict, account_ids: Optional[Iterable[int]] = None) -> Dict[int, List[Dict]]:
+        """A snapshot's quota status as of now, for all or some of its accounts"""
+        platform_ids = {account.id: account.platform_id for account in snapshot["accounts"]}
+        quotas_by_account = snapshot["quotas_by_account"]
+        if account_ids is not None:
+            quotas_by_account = {account_id: quotas_by_account[account_id] for account_id in account_ids}
+        return quota_tracker.current_status(quotas_by_account, platform_ids)
+    
+    async def get_snapshot(self, db: AsyncSession, user_id: int) -> Dict:
+        """A user's accounts and flushed quota status, loaded if not in memory"""
+        snapshot = self._snapshots.get(user_id)
+        if snapshot is None:
+            snapshots = await self._load(db, [user_id])
+            snapshot = snapshots[user_id]
+        return snapshot
+    
+    async def _load(self, db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Load the snapshots of several users with two queries"""
+        user_ids = list(user_ids)
+        versions = {user_id: self._versions.get(user_id, 0) for user_id in user_ids}
+        result = await db.execute(
+            select(PlatformAccount)
+            .where(PlatformAccount.user_id.in_(user_ids))
+            .order_by(PlatformAccount.id)
+        )
+        accounts = result.scalars().all()
+        quotas_by_account = await quota_tracker.get_quota_status_many(
+            db, [account.id for account in accounts], include_pending=False
+        )
+        
+        snapshots = {user_id: {"accounts": [], "quotas_by_account": {}} for user_id in user_ids}
+        for account in accounts:
+            snapshot = snapshots[account.user_id]
+            snapshot["accounts"].append(account)
+            snapshot["quotas_by_account"][account.id] = quotas_by_account[account.id]
+        
+        for user_id, snapshot in snapshots.items():
+            if self._versions.get(user_id, 0) != versions[user_id]:
+                continue
+            self._snapshots[user_id] = snapshot
+            for quotas in self.current_quotas(snapshot).values():
+                self.schedule_resets(user_id, quotas)
+        
+        return snapshots
+    
+    def note_usage(self, user_id: int, account_id: int):
+        """Queue the resets of an account's quotas after usage was recorded for it"""
+        snapshot = self._snapshots.get(user_id)
+        # Without a snapshot, the flush of the usage queues them
+        if snapshot is None or account_id not in snapshot["quotas_by_account"]:
+            return
+        self.schedule_resets(user_id, self.current_quotas(snapshot, [account_id])[account_id])
+    
+    def schedule_resets(self, user_id: int, quotas: List[Dict]):
+        """Queue the resets of the quotas that have usage in their window"""
+        for quota in quotas:
+            if quota["used_quota"] <= 0 or (user_id, quota["reset_at"]) in self._scheduled:
+                continue
+            
+            reset_at = quota["reset_at"]
+            wake_earlier = not self._resets or reset_at < self._resets[0][0]
+            self._scheduled.add((user_id, reset_at))
+            heapq.heappush(self._resets, (reset_at, user_id))
+            if wake_earlier and self._wakeup is not None:
+                self._wakeup.set()
+    
+    async def _reload(self, user_ids: List[int]):
+        for start in range(0, len(user_ids), self.BATCH_SIZE):
+            async with async_session_maker() as db:
+                await self._load(db, user_ids[start:start + self.BATCH_SIZE])
+    
+    async def _warm_up(self):
+        """Load snapshots for every user with connected accounts"""
+        async with async_session_maker() as db:
+            result = await db.execute(select(PlatformAccount.user_id).distinct())
+            user_ids = list(result.scalars().all())
+        await self._reload(user_ids)
+    
+    async def _run(self):
+        """Announce quota resets to streams and ETags, sleeping until the next reset time"""
+        try:
+            await self._warm_up()
+        except Exception as e:
+            print(f"Error warming up recommendations: {e}")
+        
+        while True:
+            timeout = None
+            if self._resets:
+                timeout = max(0.0, (self._resets[0][0] - datetime.utcnow()).total_seconds())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            now = datetime.utcnow()
+            due = set()
+            while self._resets and self._resets[0][0] <= now:
+                reset_at, user_id = heapq.heappop(self._resets)
+                self._scheduled.discard((user_id, reset_at))
+                due.add(user_id)
+            
+            for user_id in due:
+                quota_stream_hub.notify(user_id)
+                user_versions.bump(user_id)
+
+
+# Singleton instance
+recommendation_engine = RecommendationEngine()
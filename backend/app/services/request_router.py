@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import Dict, Optional
+import math
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.quota_optimizer import quota_optimizer
+from app.services.quota_tracker import quota_tracker
+from app.services.rate_limiter import rate_limiter
+from app.services.recommendation_engine import recommendation_engine
+from app.services.usage_buffer import usage_buffer
+
+
+class RequestRouter:
+    """
+    Picks the account to send a request through and reserves its usage.
+    
+    Decisions are made from the recommendation engine's in-memory snapshot
+    plus buffered usage, so no query runs once a user's snapshot is loaded.
+    Accounts are tried from the most urgent to use (and most remaining
+    quota) down; the capacity check and the reservation in the usage buffer
+    happen without yielding to the event loop, so concurrent requests in
+    this process can't both take the last of a quota. If an account can't
+    be reserved (its per-minute limit is hit, say), the next one is tried.
+    
+    A reservation is recorded as a usage event whose idempotency key is its
+    reservation_id. A client that also reports the call to /api/usage/events
+    under that key gets it counted as a duplicate, so it is charged once.
+    """
+    
+    async def route(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        amount: float = 1.0,
+        platform_id: Optional[str] = None,
+        action: str = "api_call"
+    ) -> Dict:
+        """
+        Reserve amount on the best account. The result's status is "ok" (with
+        the account, its quota status after the reservation and the
+        reservation_id),
+        "no_accounts", "rate_limited" (with retry_after seconds), "too_large"
+        (amount exceeds the per-minute limit of every account that had room
+        for it otherwise, so retrying won't help) or "exhausted".
+        """
+        snapshot = await recommendation_engine.get_snapshot(db, user_id)
+        accounts = [
+            account for account in snapshot["accounts"]
+            if platform_id is None or account.platform_id == platform_id
+        ]
+        if not accounts:
+            return {"status": "no_accounts"}
+        
+        now = datetime.utcnow()
+        quotas_by_account = recommendation_engine.current_quotas(snapshot, [account.id for account in accounts])
+        scores = quota_optimizer.score_quotas(quotas_by_account, now)
+        
+        def rank(account):
+            quotas = quotas_by_account[account.id]
+            remaining = min((quota["remaining_quota"] for quota in quotas), default=0.0)
+            return scores[account.id]["average"], remaining
+        
+        retry_after = None
+        for account in sorted(accounts, key=rank, reverse=True):
+            # Short quotas are enforced by the sliding-window limiter instead
+            limited = {quota_type for quota_type, _, _ in rate_limiter.get_limits(account.platform_id)}
+            quotas = [quota for quota in quotas_by_account[account.id] if quota["quota_type"] not in limited]
+            if not quota_tracker.has_capacity(quotas, amount, now):
+                continue
+            
+            reservation_id = str(uuid.uuid4())
+            allowed, wait = usage_buffer.try_record(user_id, account, amount, action, idempotency_key=reservation_id)
+            if not allowed:
+                retry_after = wait if retry_after is None else min(retry_after, wait)
+                continue
+            
+            quotas = recommendation_engine.current_quotas(snapshot, [account.id])
+            return {"status": "ok", "account": account, "quotas": quotas[account.id], "reservation_id": reservation_id}
+        
+        if retry_after == math.inf:
+            return {"status": "too_large"}
+        if retry_after is not None:
+            return {"status": "rate_limited", "retry_after": retry_after}
+        return {"status": "exhausted"}
+
+
+# Singleton instance
+request_router = RequestRouter()
@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import math
+
+from app.models.platform_account import PlatformAccount
+from app.services.platform_catalog import platform_catalog
+
+
+class ScheduleSolver:
+    """
+    Allocates expected demand to accounts over the 3-hour slots of a day.
+    
+    Each quota is modelled as a sequence of windows: the current one holds
+    remaining_quota and every later one (after each reset) holds total_quota.
+    An account can serve up to the smallest capacity of its quotas in a
+    slot, and using it consumes all of them.
+    
+    Slots are filled in time order. Within a slot, demand goes to the account
+    whose binding capacity resets first (earliest deadline first), since
+    whatever is left of it is lost at that reset while later capacity can
+    still be used in later slots. For accounts with a single quota this
+    greedy maximizes total usage; with several quotas per account it is a
+    close approximation.
+    
+    Amounts are whole units. The fraction of a unit of demand a slot can't
+    use is carried over to the next one, so a demand of 0.5 per slot is
+    planned as 1 every other slot.
+    """
+    
+    SLOT_HOURS = 3
+    # Local hours the schedule covers (6 AM to midnight)
+    ACTIVE_HOURS = (6, 24)
+    SLOT_NAMES = {
+        0: "Late Night (12-3 AM)",
+        3: "Early Morning (3-6 AM)",
+        6: "Morning (6-9 AM)",
+        9: "Late Morning (9-12 PM)",
+        12: "Afternoon (12-3 PM)",
+        15: "Late Afternoon (3-6 PM)",
+        18: "Evening (6-9 PM)",
+        21: "Night (9-12 AM)"
+    }
+    
+    def _get_timezone(self, name: Optional[str]) -> ZoneInfo:
+        try:
+            return ZoneInfo(name or "UTC")
+        except (ZoneInfoNotFoundError, ValueError):
+            return ZoneInfo("UTC")
+    
+    def build_slots(self, now: datetime, tz_name: Optional[str] = None) -> List[Tuple[str, datetime, datetime]]:
+        """
+        The active 3-hour slots of the next 24 hours in the user's timezone,
+        as (name, start, end) in naive UTC. The current slot starts at now.
+        """
+        tz = self._get_timezone(tz_name)
+        local_now = now.replace(tzinfo=timezone.utc).astimezone(tz)
+        day = datetime(local_now.year, local_now.month, local_now.day)
+        first_hour = local_now.hour // self.SLOT_HOURS * self.SLOT_HOURS
+        horizon = now + timedelta(hours=24)
+        
+        def to_utc(hours: int) -> datetime:
+            # Built from wall-clock time so slots follow DST changes
+            wall = day + timedelta(hours=hours)
+            return wall.replace(tzinfo=tz).astimezone(timezone.utc).replace(tzinfo=None)
+        
+        slots = []
+        for hour in range(first_hour, first_hour + 24, self.SLOT_HOURS):
+            if not self.ACTIVE_HOURS[0] <= hour % 24 < self.ACTIVE_HOURS[1]:
+                continue
+            start = max(now, to_utc(hour))
+            end = min(horizon, to_utc(hour + self.SLOT_HOURS))
+            if start < end:
+                slots.append((self.SLOT_NAMES[hour % 24], start, end))
+        
+        return slots
+    
+    def _build_windows(self, account: PlatformAccount, quotas: List[Dict]) -> List[Dict]:
+        windows = []
+        for quota in quotas:
+            period = platform_catalog.get_reset_period(account.platform_id, quota["quota_type"])
+            if period is None or period <= timedelta(0):
+                continue
+            windows.append({
+                "quota_type": quota["quota_type"],
+                "total": quota["total_quota"],
+                "remaining": quota["remaining_quota"],
+                "reset_at": quota["reset_at"],
+                "period": period
+            })
+        return windows
+    
+    def _slot_capacity(self, window: Dict, start: datetime, end: datetime) -> Tuple[float, int]:
+        """Capacity of a quota within [start, end) and the number of resets in it"""
+        # Roll windows that reset before the slot started
+        if window["reset_at"] <= start:
+            elapsed = (start - window["reset_at"]) // window["period"] + 1
+            window["reset_at"] += elapsed * window["period"]
+            window["remaining"] = window["total"]
+        
+        resets = 0
+        if window["reset_at"] < end:
+            resets = (end - window["reset_at"] - timedelta(microseconds=1)) // window["period"] + 1
+        return window["remaining"] + resets * window["total"], resets
+    
+    def _consume(self, window: Dict, amount: float, resets: int):
+        """Use amount of a quota in a slot, filling its earliest windows first"""
+        if resets == 0:
+            window["remaining"] = max(0.0, window["remaining"] - amount)
+            return
+        
+        # Usage that didn't fit in the current and the complete windows in
+        # the slot lands in the window that is still open at the end of it
+        overflow = amount - window["remaining"] - (resets - 1) * window["total"]
+        window["remaining"] = window["total"] - max(0.0, overflow)
+        window["reset_at"] += resets * window["period"]
+    
+    def solve(
+        self,
+        accounts: List[PlatformAccount],
+        quotas_by_account: Dict[int, List[Dict]],
+        slots: List[Tuple[str, datetime, datetime]],
+        demand_per_hour: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Allocate demand to accounts slot by slot.
+        
+        The accounts share demand_per_hour, so they should all count the
+        same unit. demand_per_hour of None means unlimited demand, i.e. every
+        account is used up to its capacity. Returns one allocation per
+        (slot, account) with a positive amount, in slot order.
+        """
+        state = [
+            (account, self._build_windows(account, quotas_by_account.get(account.id, [])))
+            for account in accounts
+        ]
+        state = [(account, windows) for account, windows in state if windows]
+        
+        allocations = []
+        carry = 0.0
+        for name, start, end in slots:
+            demand = None
+            if demand_per_hour is not None:
+                expected = demand_per_hour * (end - start).total_seconds() / 3600 + carry
+                demand = math.floor(expected + 1e-9)
+                carry = max(0.0, expected - demand)
+            
+            candidates = []
+            for account, windows in state:
+                capacities = [self._slot_capacity(window, start, end) for window in windows]
+                binding = min(range(len(windows)), key=lambda i: capacities[i][0])
+                capacity = capacities[binding][0]
+                if capacity > 0:
+                    candidates.append((windows[binding]["reset_at"], account.id, account, windows, capacities, binding))
+            
+            candidates.sort(key=lambda candidate: candidate[:2])
+            for deadline, _, account, windows, capacities, binding in candidates:
+                if demand is not None and demand <= 0:
+                    break
+                amount = capacities[binding][0] if demand is None else min(demand, capacities[binding][0])
+                # Whole units, tolerating float error in the capacity
+                amount = math.floor(amount + 1e-9)
+                if amount <= 0:
+                    continue
+                for window, (_, resets) in zip(windows, capacities):
+                    self._consume(window, amount, resets)
+                if demand is not None:
+                    demand -= amount
+                
+                allocations.append({
+                    "time_slot": name,
+                    "starts_at": start,
+                    "ends_at": end,
+                    "account": account,
+                    "quota_type": windows[binding]["quota_type"],
+                    "amount": float(amount),
+                    "expires_at": deadline
+                })
+        
+        return allocations
+
+
+# Singleton instance
+schedule_solver = ScheduleSolver()
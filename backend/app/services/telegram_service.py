@@ -1,6 +1,6 @@
 from typing import Optional, Dict
-import httpx
 from app.config import settings
+from app.services.http_client import http_client
 
 
 class TelegramService:
@@ -16,17 +16,16 @@ class TelegramService:
             return False
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/sendMessage",
-                    json={
-                        "chat_id": chat_id,
-                        "text": message,
-                        "parse_mode": parse_mode
-                    },
-                    timeout=10.0
-                )
-                return response.status_code == 200
+            response = await http_client.post(
+                f"{self.base_url}/sendMessage",
+                json={
+                    "chat_id": chat_id,
+                    "text": message,
+                    "parse_mode": parse_mode
+                },
+                timeout=10.0
+            )
+            return response.status_code == 200
         except Exception as e:
             print(f"Error sending Telegram message: {e}")
             return False
@@ -0,0 +1,280 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import asyncio
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.platform_account import PlatformAccount
+from app.models.usage_log import UsageLog
+from app.services.etags import user_versions
+from app.services.quota_stream import quota_stream_hub
+from app.services.quota_tracker import quota_tracker
+from app.services.rate_limiter import rate_limiter
+from app.services.recommendation_engine import recommendation_engine
+from app.services.ttl_cache import TTLCache
+from app.services.usage_rate import usage_rate_estimator
+
+
+class UsageBuffer:
+    """
+    Write-behind buffer for usage events.
+    
+    Events are queued in memory and written by a background task in batches:
+    usage log rows with one executemany INSERT, and quota increments coalesced
+    per account, all in a single transaction. A batch is flushed once it
+    reaches the size threshold or has waited for the flush interval.
+    Unflushed amounts are published in quota_tracker.pending_usage so quota
+    reads stay correct in the meantime.
+    
+    A batch whose transaction fails (e.g. "database is locked") stays
+    pending and is retried with exponential backoff, up to max_retries
+    times; only then are its events dropped.
+    
+    Events may carry a client idempotency key. Keys of queued and recently
+    flushed events are remembered in recent_keys (and forgotten again if
+    their events are dropped); the unique (user_id, idempotency_key) index
+    makes the INSERT skip any duplicate that still gets through, and only
+    the rows actually inserted count towards quotas.
+    """
+    
+    _STOP = object()
+    # Longest wait (seconds) between attempts to flush a failing batch
+    MAX_RETRY_BACKOFF = 30.0
+    
+    def __init__(
+        self,
+        max_batch_size: int,
+        flush_interval: float,
+        idempotency_ttl: float,
+        max_idempotency_keys: int,
+        max_retries: int,
+        retry_backoff: float
+    ):
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # (user_id, idempotency_key) of events queued or recently flushed
+        self.recent_keys = TTLCache(max_entries=max_idempotency_keys, ttl_seconds=idempotency_ttl)
+        # Created on first use, so it belongs to the event loop that runs the buffer
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def queue(self) -> asyncio.Queue:
+        """Events waiting for the next flush"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+    
+    def start(self):
+        """Start the background flush task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Flush all queued events and stop the background task"""
+        if self._task is None:
+            return
+        self.queue.put_nowait(self._STOP)
+        await self._task
+        self._task = None
+        # A later start (e.g. another app lifespan) may run on a new event loop
+        self._queue = None
+    
+    def record(
+        self,
+        user_id: int,
+        account_id: Optional[int],
+        amount: float,
+        action: str = "api_call",
+        details: Optional[str] = None,
+        timestamp: Optional[datetime] = None,
+        idempotency_key: Optional[str] = None
+    ):
+        """Queue a usage event for the next flush"""
+        self.queue.put_nowait({
+            "user_id": user_id,
+            "account_id": account_id,
+            "action": action,
+            "details": details,
+            "amount": amount,
+            "timestamp": timestamp or datetime.utcnow(),
+            "idempotency_key": idempotency_key
+        })
+        if idempotency_key is not None:
+            self.recent_keys.set((user_id, idempotency_key), True)
+        if account_id is not None and amount:
+            quota_tracker.pending_usage[account_id] = quota_tracker.pending_usage.get(account_id, 0.0) + amount
+            quota_stream_hub.notify(user_id, account_id)
+            user_versions.bump(user_id)
+            recommendation_engine.note_usage(user_id, account_id)
+    
+    def try_record(
+        self,
+        user_id: int,
+        account: PlatformAccount,
+        amount: float,
+        action: str = "api_call",
+        details: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Tuple[bool, float]:
+        """
+        Queue a usage event if the account's short (per-minute) quotas allow
+        it. Returns whether it was recorded and, if not, the seconds to wait
+        (math.inf if the amount exceeds one of those limits outright).
+        """
+        allowed, retry_after = rate_limiter.acquire(account.id, account.platform_id, amount)
+        if allowed:
+            self.record(user_id, account.id, amount, action, details, idempotency_key=idempotency_key)
+        return allowed, retry_after
+    
+    async def _run(self):
+        """Collect queued events into batches and flush them"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        queue = self.queue
+        
+        while not stopping:
+            event = await queue.get()
+            if event is self._STOP:
+                break
+            
+            batch = [event]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if event is self._STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+            
+            await self._flush_with_retry(batch)
+        
+        # Drain anything queued behind the stop marker
+        batch = []
+        while not queue.empty():
+            event = queue.get_nowait()
+            if event is not self._STOP:
+                batch.append(event)
+        for start in range(0, len(batch), self.max_batch_size):
+            await self._flush_with_retry(batch[start:start + self.max_batch_size])
+    
+    async def _flush_with_retry(self, batch: List[Dict]):
+        """Flush a batch, retrying with backoff while the write fails"""
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            if await self._flush(batch):
+                return
+            if attempt < self.max_retries:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_RETRY_BACKOFF)
+        
+        print(f"Error: dropping {len(batch)} usage events after {self.max_retries + 1} failed flushes")
+        self._release_pending(self._deltas(batch))
+        for event in batch:
+            # Let clients retry the dropped events under the same keys
+            if event["idempotency_key"] is not None:
+                self.recent_keys.pop((event["user_id"], event["idempotency_key"]))
+            if event["account_id"] is not None and event["amount"]:
+                quota_stream_hub.notify(event["user_id"], event["account_id"])
+                user_versions.bump(event["user_id"])
+    
+    async def _flush(self, batch: List[Dict]) -> bool:
+        """
+        Write a batch of usage events in a single transaction. Returns
+        whether it was written; a failed batch stays pending.
+        """
+        deltas = self._deltas(batch)
+        inserted = batch
+        applied = deltas
+        status_by_account = {}
+        
+        try:
+            async with async_session_maker() as db:
+                if any(event["idempotency_key"] is not None for event in batch):
+                    # Duplicate keys are skipped; count only the rows that went in
+                    result = await db.execute(
+                        sqlite_insert(UsageLog)
+                        .on_conflict_do_nothing()
+                        .returning(UsageLog.account_id, UsageLog.amount, UsageLog.timestamp),
+                        batch
+                    )
+                    inserted = [
+                        {"account_id": account_id, "amount": amount, "timestamp": timestamp}
+                        for account_id, amount, timestamp in result.all()
+                    ]
+                    applied = self._deltas(inserted)
+                else:
+                    await db.execute(insert(UsageLog), batch)
+                
+                # Each event only counts towards the quota windows it happened in
+                usage_by_account: Dict[int, List[Tuple[datetime, float]]] = defaultdict(list)
+                for event in inserted:
+                    if event["account_id"] is not None and event["amount"]:
+                        usage_by_account[event["account_id"]].append((event["timestamp"], event["amount"]))
+                for account_id, amount in applied.items():
+                    status_by_account[account_id] = await quota_tracker.apply_usage(
+                        db, account_id, amount, usage_by_account[account_id]
+                    )
+                await db.commit()
+        except Exception as e:
+            print(f"Error flushing {len(batch)} usage events: {e}")
+            return False
+        
+        # Moved from pending to the snapshots in one step, so readers never
+        # see the amounts twice or not at all
+        self._release_pending(deltas)
+        users = {event["account_id"]: event["user_id"] for event in batch}
+        status_by_user: Dict[int, Dict[int, List[Dict]]] = defaultdict(dict)
+        for account_id, quotas in status_by_account.items():
+            status_by_user[users[account_id]][account_id] = quotas
+        for user_id in {event["user_id"] for event in batch if event["amount"]}:
+            recommendation_engine.apply_flushed_usage(user_id, status_by_user.get(user_id, {}))
+            user_versions.bump(user_id)
+        # Skipped duplicates leave quotas lower than streams were last told
+        if applied is not deltas:
+            for event in batch:
+                if applied.get(event["account_id"], 0.0) != deltas.get(event["account_id"], 0.0):
+                    quota_stream_hub.notify(event["user_id"], event["account_id"])
+        for event in inserted:
+            if event["account_id"] is not None and event["amount"] > 0:
+                usage_rate_estimator.observe(event["account_id"], event["amount"], event["timestamp"])
+        return True
+    
+    def _deltas(self, events: List[Dict]) -> Dict[int, float]:
+        """Total amount per account"""
+        deltas: Dict[int, float] = defaultdict(float)
+        for event in events:
+            if event["account_id"] is not None and event["amount"]:
+                deltas[event["account_id"]] += event["amount"]
+        return deltas
+    
+    def _release_pending(self, deltas: Dict[int, float]):
+        """Remove flushed (or dropped) amounts from the pending usage"""
+        for account_id, amount in deltas.items():
+            remaining = quota_tracker.pending_usage.get(account_id, 0.0) - amount
+            if abs(remaining) < 1e-9:
+                quota_tracker.pending_usage.pop(account_id, None)
+            else:
+                quota_tracker.pending_usage[account_id] = remaining
+
+# Singleton instance
+usage_buffer = UsageBuffer(
+    max_batch_size=settings.usage_flush_max_events,
+    flush_interval=settings.usage_flush_interval_seconds,
+    idempotency_ttl=settings.usage_idempotency_ttl_seconds,
+    max_idempotency_keys=settings.usage_idempotency_max_keys,
+    max_retries=settings.usage_flush_max_retries,
+    retry_backoff=settings.usage_flush_retry_backoff_seconds
+)
@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.usage_log import UsageLog
+from app.services.rate_limiter import rate_limiter
+from app.services.recommendation_engine import recommendation_engine
+from app.services.usage_buffer import usage_buffer
+
+
+class UsageIngestor:
+    """
+    Accepts batches of usage events reported by clients.
+    
+    Events are validated against the user's accounts (from the in-memory
+    recommendation snapshot) and queued in the usage buffer, which writes
+    them in batched transactions. Accepted amounts are also recorded in the
+    rate limiter's sliding windows, so routing accounts for them. Events
+    whose idempotency key was already seen are skipped: keys are looked up
+    in the buffer's recent keys first and the remaining ones with one
+    indexed query per chunk. Routed calls are charged when they are
+    reserved, under their reservation_id as the key, so a report of one
+    under that key is skipped the same way.
+    """
+    
+    # Keys per IN (...) query when checking the database
+    KEY_QUERY_CHUNK = 500
+    
+    def _normalize_timestamp(self, timestamp: Optional[datetime], now: datetime) -> datetime:
+        """Naive UTC, and never in the future"""
+        if timestamp is None:
+            return now
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return min(timestamp, now)
+    
+    async def _find_existing_keys(self, db: AsyncSession, user_id: int, keys: Iterable[str]) -> Set[str]:
+        keys = list(keys)
+        existing = set()
+        for start in range(0, len(keys), self.KEY_QUERY_CHUNK):
+            result = await db.execute(
+                select(UsageLog.idempotency_key).where(
+                    UsageLog.user_id == user_id,
+                    UsageLog.idempotency_key.in_(keys[start:start + self.KEY_QUERY_CHUNK])
+                )
+            )
+            existing.update(result.scalars().all())
+        return existing
+    
+    async def ingest(self, db: AsyncSession, user_id: int, events: List) -> Dict:
+        """Queue a batch of events; returns the accepted and duplicate counts and rejected events"""
+        snapshot = await recommendation_engine.get_snapshot(db, user_id)
+        platform_ids = {account.id: account.platform_id for account in snapshot["accounts"]}
+        
+        unknown_keys = {
+            event.idempotency_key for event in events
+            if event.idempotency_key is not None
+            and usage_buffer.recent_keys.get((user_id, event.idempotency_key)) is None
+        }
+        existing_keys = await self._find_existing_keys(db, user_id, unknown_keys) if unknown_keys else set()
+        for key in existing_keys:
+            usage_buffer.recent_keys.set((user_id, key), True)
+        
+        # No awaits from here on, so concurrent batches can't both accept a key
+        now = datetime.utcnow()
+        accepted = 0
+        duplicates = 0
+        rejected = []
+        for index, event in enumerate(events):
+            if event.account_id not in platform_ids:
+                rejected.append({"index": index, "reason": "Account not found"})
+                continue
+            
+            key = event.idempotency_key
+            if key is not None and usage_buffer.recent_keys.get((user_id, key)) is not None:
+                duplicates += 1
+                continue
+            
+            timestamp = self._normalize_timestamp(event.timestamp, now)
+            usage_buffer.record(
+                user_id,
+                event.account_id,
+                event.amount,
+                event.action,
+                event.details,
+                timestamp,
+                key
+            )
+            rate_limiter.record(
+                event.account_id,
+                platform_ids[event.account_id],
+                event.amount,
+                (now - timestamp).total_seconds()
+            )
+            accepted += 1
+        
+        return {"accepted": accepted, "duplicates": duplicates, "rejected": rejected}
+
+
+# Singleton instance
+usage_ingestor = UsageIngestor()
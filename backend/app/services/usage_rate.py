@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select
+import math
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.usage_log import UsageLog
+
+
+class UsageRateEstimator:
+    """
+    Streaming estimate of each account's consumption per hour.
+    
+    Every recorded usage event adds amount / tau to the account's rate, and
+    the rate decays exponentially with time constant tau in between (an
+    exponentially weighted moving average over time rather than over events,
+    so irregular gaps are handled correctly). A steady consumption of r per
+    hour converges to a rate of r.
+    """
+    
+    def __init__(self, half_life_hours: float):
+        self.half_life_hours = half_life_hours
+        self.tau_hours = half_life_hours / math.log(2)
+        # account_id -> (rate per hour, time the rate was last updated)
+        self._rates: Dict[int, Tuple[float, datetime]] = {}
+    
+    def observe(self, account_id: int, amount: float, timestamp: Optional[datetime] = None):
+        """Fold a usage event into the account's rate"""
+        timestamp = timestamp or datetime.utcnow()
+        rate, updated_at = self._rates.get(account_id, (0.0, timestamp))
+        
+        if timestamp >= updated_at:
+            rate = self._decay(rate, timestamp - updated_at)
+            updated_at = timestamp
+        else:
+            # Late event: decay its contribution to the current reference time
+            amount = self._decay(amount, updated_at - timestamp)
+        
+        self._rates[account_id] = (rate + amount / self.tau_hours, updated_at)
+    
+    def forget(self, account_id: int):
+        """Drop the state of a deleted account"""
+        self._rates.pop(account_id, None)
+    
+    def get_rate(self, account_id: int, now: Optional[datetime] = None) -> float:
+        """Estimated consumption per hour"""
+        entry = self._rates.get(account_id)
+        if entry is None:
+            return 0.0
+        rate, updated_at = entry
+        now = now or datetime.utcnow()
+        return self._decay(rate, now - updated_at) if now > updated_at else rate
+    
+    def predict(self, account_id: int, quota_info: Dict, now: Optional[datetime] = None) -> Dict:
+        """Predicted utilisation and waste of a quota at the end of its window"""
+        now = now or datetime.utcnow()
+        total = quota_info["total_quota"]
+        used = quota_info["used_quota"]
+        remaining = quota_info["remaining_quota"]
+        hours_until_reset = max(0.0, (quota_info["reset_at"] - now).total_seconds() / 3600)
+        
+        predicted_usage = min(remaining, self.get_rate(account_id, now) * hours_until_reset)
+        utilization = (used + predicted_usage) / total * 100 if total > 0 else 0
+        
+        return {
+            "predicted_utilization": round(min(utilization, 100.0), 2),
+            "predicted_waste": round(remaining - predicted_usage, 2)
+        }
+    
+    def _decay(self, value: float, elapsed: timedelta) -> float:
+        return value * math.exp(-(elapsed.total_seconds() / 3600) / self.tau_hours)
+    
+    async def warm_up(self, window_half_lives: float = 5.0):
+        """Rebuild the rates from recent usage logs"""
+        since = datetime.utcnow() - timedelta(hours=self.half_life_hours * window_half_lives)
+        async with async_session_maker() as db:
+            result = await db.stream(
+                select(UsageLog.account_id, UsageLog.amount, UsageLog.timestamp)
+                .where(UsageLog.timestamp >= since, UsageLog.account_id.is_not(None), UsageLog.amount > 0)
+                .order_by(UsageLog.timestamp)
+                .execution_options(yield_per=1000)
+            )
+            async for account_id, amount, timestamp in result:
+                self.observe(account_id, amount, timestamp)
+
+
+# Singleton instance
+usage_rate_estimator = UsageRateEstimator(settings.usage_rate_half_life_hours)
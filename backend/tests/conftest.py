@@ -0,0 +1,102 @@
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# Keep the app's default engine away from ./data before app.config is imported
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/app.db"
+
+# Accounts of user 1 in the seeded database
+SEEDED_ACCOUNTS = {1: "openai_free", 2: "gemini_free"}
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """URL of an empty SQLite database file for one test"""
+    return f"sqlite+aiosqlite:///{tmp_path}/app.db"
+
+
+@pytest.fixture
+def seeded_database_url(database_url):
+    """URL of an upgraded database with user 1 and the SEEDED_ACCOUNTS with fresh quotas"""
+    from sqlalchemy import insert, text
+    from app.database import build_engine
+    from app.migrations import upgrade_database
+    from app.models.quota import Quota
+    from app.services.encryption import encryption_service
+    from app.services.quota_tracker import quota_tracker
+    
+    async def seed():
+        db_engine = build_engine(database_url)
+        try:
+            await upgrade_database(db_engine)
+            now = datetime.utcnow()
+            async with db_engine.begin() as conn:
+                await conn.execute(text(
+                    "INSERT INTO users (id, email, hashed_password, preferred_language, timezone, is_active, created_at) "
+                    "VALUES (1, 'a@example.com', 'x', 'en', 'UTC', 1, :now)"
+                ), {"now": now})
+                for account_id, platform_id in SEEDED_ACCOUNTS.items():
+                    await conn.execute(text(
+                        "INSERT INTO platform_accounts (id, user_id, platform_id, encrypted_api_key, api_key_preview) "
+                        "VALUES (:id, 1, :platform_id, :key, 'sk-...test')"
+                    ), {"id": account_id, "platform_id": platform_id, "key": encryption_service.encrypt("sk-test")})
+                    await conn.execute(insert(Quota), quota_tracker.initial_quota_values(account_id, platform_id, now))
+        finally:
+            await db_engine.dispose()
+    
+    asyncio.run(seed())
+    return database_url
+
+
+@pytest.fixture
+def db_engine(seeded_database_url):
+    """Engine on the seeded database, disposed after the test"""
+    from app.database import build_engine
+    
+    engine = build_engine(seeded_database_url)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def session_maker(db_engine):
+    """Session factory on the seeded database"""
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def idle_usage_buffer(monkeypatch):
+    """
+    The usage_buffer singleton without its flush task: recorded events stay
+    in a queue and in pending usage that are private to the test.
+    """
+    from app.services.quota_tracker import quota_tracker
+    from app.services.usage_buffer import usage_buffer
+    
+    monkeypatch.setattr(usage_buffer, "_queue", asyncio.Queue())
+    monkeypatch.setattr(quota_tracker, "pending_usage", {})
+    return usage_buffer
+
+
+@pytest.fixture
+def client(session_maker):
+    """TestClient signed in as user 1 on the seeded database, without the app lifespan"""
+    from fastapi.testclient import TestClient
+    from app.database import get_db
+    from app.main import app
+    from app.routers.auth import create_access_token
+    
+    async def db():
+        async with session_maker() as session:
+            yield session
+    
+    app.dependency_overrides[get_db] = db
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'a@example.com'})}"
+    yield client
+    app.dependency_overrides.clear()
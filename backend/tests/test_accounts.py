@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.services.encryption import encryption_service
+
+
+def _bulk_accounts(count: int, platform_id: str = "claude_free"):
+    return {"accounts": [{"platform_id": platform_id, "api_key": f"sk-test-{i:04d}"} for i in range(count)]}
+
+
+def _list_timing(client) -> float:
+    """Fastest of several GET /api/accounts"""
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        response = client.get("/api/accounts")
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    return min(timings)
+
+
+async def _execute(db_engine, statement: str):
+    async with db_engine.begin() as conn:
+        await conn.execute(text(statement))
+
+
+def test_listing_100_accounts_never_decrypts(client, db_engine, monkeypatch):
+    seeded = len(client.get("/api/accounts").json())
+    assert client.post("/api/accounts/bulk", json=_bulk_accounts(100)).status_code == 201
+    
+    def fail(encrypted_text):
+        raise AssertionError("decrypted an API key")
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(encryption_service, "decrypt", fail)
+        after = _list_timing(client)
+        accounts = client.get("/api/accounts").json()
+        assert client.get(f"/api/accounts/{accounts[-1]['id']}").status_code == 200
+    
+    assert len(accounts) == seeded + 100
+    assert accounts[-1]["api_key_preview"] == encryption_service.mask_api_key("sk-test-0099")
+    
+    # Before: without stored previews every listing decrypts every key
+    asyncio.run(_execute(db_engine, "UPDATE platform_accounts SET api_key_preview = NULL"))
+    before = _list_timing(client)
+    
+    print(f"GET /api/accounts with {len(accounts)} accounts: {before * 1000:.1f} ms decrypting, {after * 1000:.1f} ms with stored previews")
+    assert after < before
+
+
+async def _stored_accounts(db_engine):
+    """(account id, platform id) of every account, and (account id, quota type, total) of every quota"""
+    async with db_engine.connect() as conn:
+        accounts = (await conn.execute(text("SELECT id, platform_id FROM platform_accounts ORDER BY id"))).all()
+        quotas = (await conn.execute(text(
+            "SELECT account_id, quota_type, total_quota FROM quotas ORDER BY account_id, quota_type"
+        ))).all()
+    return [tuple(row) for row in accounts], [tuple(row) for row in quotas]
+
+
+def test_bulk_create_with_an_unknown_platform_writes_nothing(client, db_engine):
+    stored = asyncio.run(_stored_accounts(db_engine))
+    accounts = _bulk_accounts(3)["accounts"]
+    accounts[1]["platform_id"] = "no_such_platform"
+    
+    response = client.post("/api/accounts/bulk", json={"accounts": accounts})
+    
+    assert response.status_code == 400
+    assert "1: no_such_platform" in response.json()["detail"]
+    assert asyncio.run(_stored_accounts(db_engine)) == stored
+
+
+def test_bulk_create_returns_the_inserted_rows(client, db_engine):
+    seeded_accounts, seeded_quotas = asyncio.run(_stored_accounts(db_engine))
+    
+    response = client.post("/api/accounts/bulk", json={"accounts": [
+        {"platform_id": "gemini_free", "api_key": "sk-gemini-0001", "account_identifier": "work"},
+        {"platform_id": "openai_free", "api_key": "sk-openai-0002"}
+    ]})
+    
+    assert response.status_code == 201
+    created = response.json()
+    accounts, quotas = asyncio.run(_stored_accounts(db_engine))
+    assert accounts[len(seeded_accounts):] == [(account["id"], account["platform_id"]) for account in created]
+    assert quotas[len(seeded_quotas):] == sorted(
+        (account["id"], quota["quota_type"], quota["total_quota"]) for account in created for quota in account["quotas"]
+    )
+    assert created[0]["account_identifier"] == "work"
+    assert created[0]["api_key_preview"] == encryption_service.mask_api_key("sk-gemini-0001")
+    # The listing agrees with what the bulk call returned
+    listed = {account["id"]: account for account in client.get("/api/accounts").json()}
+    for account in created:
+        assert [quota["quota_type"] for quota in listed[account["id"]]["quotas"]] == [
+            quota["quota_type"] for quota in account["quotas"]
+        ]
+
+
+def test_bulk_create_accepts_at_most_100_accounts(client, db_engine):
+    stored = asyncio.run(_stored_accounts(db_engine))
+    
+    too_many = client.post("/api/accounts/bulk", json=_bulk_accounts(101))
+    empty = client.post("/api/accounts/bulk", json={"accounts": []})
+    
+    assert too_many.status_code == 422
+    assert empty.status_code == 422
+    assert asyncio.run(_stored_accounts(db_engine)) == stored
@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.rate_limiter import rate_limiter
+
+
+def test_app_lifespan_can_run_twice():
+    # Each TestClient block starts and stops the app on its own event loop
+    for attempt in range(2):
+        with TestClient(app) as client:
+            email = f"lifespan-{attempt}@example.com"
+            response = client.post("/api/auth/register", json={"email": email, "password": "pw123456"})
+            assert response.status_code == 201
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            response = client.post(
+                "/api/accounts", json={"platform_id": "gemini_free", "api_key": "sk-abcdef123456"}, headers=headers
+            )
+            assert response.status_code == 201
+            account_id = response.json()["id"]
+            try:
+                response = client.post("/api/route", json={"amount": 1}, headers=headers)
+                assert response.status_code == 200
+            finally:
+                rate_limiter.forget(account_id)
@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+
+from app.database import get_db, get_read_db
+from app.main import app
+from app.routers.auth import create_access_token, user_cache
+
+
+def test_authenticated_requests_open_one_session(session_maker):
+    opened = []
+    
+    async def counted_db():
+        opened.append(1)
+        async with session_maker() as session:
+            yield session
+    
+    # Without the lifespan, so no background services are started
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'a@example.com'})}"}
+    # Without a separate read database both resolve to the same dependency
+    assert get_read_db is get_db
+    app.dependency_overrides[get_db] = counted_db
+    try:
+        sessions = []
+        for method, path, body in [
+            ("GET", "/api/accounts", None),
+            ("POST", "/api/accounts", {"platform_id": "claude_free", "api_key": "sk-abcdef123456"}),
+        ]:
+            # Make get_current_user query the database
+            user_cache.pop("a@example.com")
+            opened.clear()
+            response = client.request(method, path, json=body, headers=headers)
+            assert response.status_code in (200, 201)
+            sessions.append(len(opened))
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert sessions == [1, 1]
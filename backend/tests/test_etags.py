@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import event
+
+from app.services.etags import etag_matches, user_versions
+
+USER_ID = 1
+GEMINI_ACCOUNT_ID = 2
+
+
+@pytest.fixture
+def statements(db_engine):
+    """SQL statements executed on the seeded database during the test"""
+    executed = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    
+    event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_etag_matches_weakly_and_in_lists():
+    etag = 'W/"dashboard-abc-1-3"'
+    assert etag_matches('W/"dashboard-abc-1-3"', etag)
+    assert etag_matches('"dashboard-abc-1-3"', etag)
+    assert etag_matches('"other", W/"dashboard-abc-1-3"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"dashboard-abc-1-2"', etag)
+    assert not etag_matches(None, etag)
+
+
+@pytest.mark.parametrize("path", ["/api/quota/dashboard", "/api/accounts", "/api/guides", "/api/guides/gemini_free"])
+def test_matching_etag_is_answered_without_the_database(client, statements, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    
+    statements.clear()
+    cached = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == first.headers["ETag"]
+    assert cached.content == b""
+    assert statements == []
+
+
+def test_etag_changes_after_recorded_usage(client, idle_usage_buffer):
+    etags = {path: client.get(path).headers["ETag"] for path in ("/api/quota/dashboard", "/api/accounts")}
+    
+    idle_usage_buffer.record(USER_ID, GEMINI_ACCOUNT_ID, 1.0)
+    
+    for path, etag in etags.items():
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+def test_etag_changes_after_account_create_and_delete(client):
+    etag = client.get("/api/accounts").headers["ETag"]
+    
+    created = client.post("/api/accounts", json={"platform_id": "claude_free", "api_key": "sk-abcdef123456"})
+    assert created.status_code == 201
+    after_create = client.get("/api/accounts", headers={"If-None-Match": etag})
+    assert after_create.status_code == 200
+    assert created.json()["id"] in [account["id"] for account in after_create.json()]
+    
+    assert client.delete(f"/api/accounts/{created.json()['id']}").status_code == 204
+    after_delete = client.get("/api/accounts", headers={"If-None-Match": after_create.headers["ETag"]})
+    assert after_delete.status_code == 200
+    assert created.json()["id"] not in [account["id"] for account in after_delete.json()]
+    assert len({etag, after_create.headers["ETag"], after_delete.headers["ETag"]}) == 3
+
+
+def test_versions_are_per_user():
+    version = user_versions.get(USER_ID)
+    other = user_versions.etag(USER_ID + 1, "accounts")
+    
+    user_versions.bump(USER_ID)
+    
+    assert user_versions.get(USER_ID) == version + 1
+    assert user_versions.etag(USER_ID + 1, "accounts") == other
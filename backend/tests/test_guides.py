@@ -0,0 +1,66 @@
+import json
+import os
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.guides import get_platform_guide
+from app.services.platform_catalog import platform_catalog
+
+
+def _rendered(content) -> bytes:
+    """A body as FastAPI rendered the guides before they were precompiled"""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def _write_catalog(path, name: str, mtime: int):
+    path.write_text(json.dumps({"platforms": [
+        {"id": "test_free", "name": name, "signup_url": "https://example.com", "quotas": [
+            {"type": "daily", "limit": 10, "reset_hours": 24, "unit": "requests"}
+        ]}
+    ]}))
+    os.utime(path, (mtime, mtime))
+
+
+def test_compiled_guides_match_the_rendered_bodies():
+    client = TestClient(app)
+    platforms = platform_catalog.list_platforms()
+    
+    guide_list = client.get("/api/guides")
+    
+    assert guide_list.content == _rendered([
+        {
+            "platform_id": platform["id"],
+            "platform_name": platform["name"],
+            "description": platform.get("description", ""),
+            "icon": platform.get("icon", ""),
+            "signup_url": platform.get("signup_url", "")
+        }
+        for platform in platforms
+    ])
+    for platform in platforms:
+        assert client.get(f"/api/guides/{platform['id']}").content == _rendered(get_platform_guide(platform["id"]))
+    assert client.get("/api/guides/no_such_platform").content == _rendered({"error": "Platform not found"})
+
+
+def test_guides_are_rebuilt_when_the_catalog_changes(tmp_path, monkeypatch):
+    path = tmp_path / "platform_quotas.json"
+    _write_catalog(path, "Test Free", mtime=1_000)
+    monkeypatch.setattr(platform_catalog, "path", path)
+    monkeypatch.setattr(platform_catalog, "check_interval", 0)
+    monkeypatch.setattr(platform_catalog, "_snapshot", platform_catalog._snapshot)
+    monkeypatch.setattr(platform_catalog, "_next_check", 0.0)
+    client = TestClient(app)
+    
+    first = client.get("/api/guides/test_free")
+    assert first.json()["platform_name"] == "Test Free"
+    
+    _write_catalog(path, "Test Free Plus", mtime=2_000)
+    second = client.get("/api/guides/test_free", headers={"If-None-Match": first.headers["ETag"]})
+    
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()["platform_name"] == "Test Free Plus"
+    assert [guide["platform_name"] for guide in client.get("/api/guides").json()] == ["Test Free Plus"]
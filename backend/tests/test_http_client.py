@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http_client import HttpClient
+
+
+def _make_client(handler, max_retries: int = 2, per_host_limit: int = 10) -> HttpClient:
+    """An HttpClient whose requests are answered by handler instead of the network"""
+    client = HttpClient(
+        timeout=5.0,
+        max_connections=10,
+        max_keepalive_connections=10,
+        per_host_limit=per_host_limit,
+        max_retries=max_retries,
+        backoff=0.0
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+class Responder:
+    """Answers requests with the given statuses (or raises the given errors) in turn"""
+    
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+    
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, httpx.Response):
+            return outcome
+        return httpx.Response(outcome)
+
+
+def _run(client: HttpClient, method: str, url: str = "http://platform.test/ping"):
+    async def scenario():
+        try:
+            return await client.request(method, url)
+        finally:
+            await client.stop()
+    
+    return asyncio.run(scenario())
+
+
+def test_idempotent_request_is_retried_on_server_errors():
+    responder = Responder(503, 502, 200)
+    
+    response = _run(_make_client(responder), "GET")
+    
+    assert response.status_code == 200
+    assert responder.calls == 3
+
+
+def test_retries_are_bounded():
+    responder = Responder(500)
+    
+    response = _run(_make_client(responder, max_retries=2), "GET")
+    
+    assert response.status_code == 500
+    assert responder.calls == 3
+
+
+def test_non_idempotent_request_is_only_retried_when_told_to():
+    responder = Responder(500, 200)
+    assert _run(_make_client(responder), "POST").status_code == 500
+    assert responder.calls == 1
+    
+    responder = Responder(429, 200)
+    assert _run(_make_client(responder), "POST").status_code == 200
+    assert responder.calls == 2
+
+
+def test_connection_failures_are_retried_then_raised():
+    request = httpx.Request("POST", "http://platform.test/ping")
+    responder = Responder(httpx.ConnectError("refused", request=request))
+    
+    with pytest.raises(httpx.ConnectError):
+        _run(_make_client(responder, max_retries=2), "POST")
+    assert responder.calls == 3
+
+
+def test_read_timeouts_are_not_retried_for_non_idempotent_requests():
+    request = httpx.Request("POST", "http://platform.test/ping")
+    responder = Responder(httpx.ReadTimeout("slow", request=request), 200)
+    
+    with pytest.raises(httpx.ReadTimeout):
+        _run(_make_client(responder), "POST")
+    assert responder.calls == 1
+
+
+def test_retry_after_is_honoured():
+    client = HttpClient(5.0, 10, 10, 10, max_retries=2, backoff=0.0)
+    response = httpx.Response(429, headers={"Retry-After": "7"})
+    
+    assert client._backoff_delay(0, response) == 7.0
+    assert client._backoff_delay(0, httpx.Response(503)) == 0.0
+
+
+def test_retry_after_beyond_the_limit_is_not_waited_for():
+    responder = Responder(httpx.Response(503, headers={"Retry-After": "3600"}), 200)
+    
+    response = _run(_make_client(responder), "GET")
+    
+    assert response.status_code == 503
+    assert responder.calls == 1
+
+
+def test_concurrency_is_limited_per_host():
+    active = {"platform-a.test": 0, "platform-b.test": 0}
+    peak = {"platform-a.test": 0, "platform-b.test": 0}
+    
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.02)
+        active[host] -= 1
+        return httpx.Response(200)
+    
+    async def scenario():
+        client = _make_client(handler, per_host_limit=2)
+        try:
+            await asyncio.gather(*(
+                client.get(f"http://{host}/ping")
+                for host in ("platform-a.test", "platform-b.test")
+                for _ in range(6)
+            ))
+        finally:
+            await client.stop()
+    
+    asyncio.run(scenario())
+    
+    assert peak == {"platform-a.test": 2, "platform-b.test": 2}
@@ -0,0 +1,103 @@
+import asyncio
+
+from sqlalchemy import delete, func, select, text
+
+from app.database import build_engine
+from app.migrations import LATEST_VERSION, schema_version, upgrade_database
+from app.services.encryption import encryption_service
+
+
+async def _interrupt_after(db_engine, version: int):
+    """Leave a database whose migrations after `version` ran but were never recorded"""
+    await upgrade_database(db_engine)
+    async with db_engine.begin() as conn:
+        await conn.execute(delete(schema_version))
+        await conn.execute(schema_version.insert().values(version=version, name="test"))
+
+
+async def _recorded_version(db_engine) -> int:
+    async with db_engine.connect() as conn:
+        result = await conn.execute(select(func.max(schema_version.c.version)))
+        return result.scalar()
+
+
+def test_upgrade_is_noop_when_current(database_url):
+    async def scenario():
+        db_engine = build_engine(database_url)
+        try:
+            assert await upgrade_database(db_engine) == LATEST_VERSION
+            assert await upgrade_database(db_engine) == LATEST_VERSION
+        finally:
+            await db_engine.dispose()
+    
+    asyncio.run(scenario())
+
+
+def test_interrupted_idempotency_key_migration_reruns(database_url):
+    async def scenario():
+        db_engine = build_engine(database_url)
+        try:
+            await _interrupt_after(db_engine, 3)
+            
+            assert await upgrade_database(db_engine) == LATEST_VERSION
+            assert await _recorded_version(db_engine) == LATEST_VERSION
+            async with db_engine.connect() as conn:
+                result = await conn.execute(text(
+                    "SELECT name FROM sqlite_master WHERE name = 'uq_usage_logs_user_id_idempotency_key'"
+                ))
+                assert result.scalar() is not None
+        finally:
+            await db_engine.dispose()
+    
+    asyncio.run(scenario())
+
+
+def test_interrupted_api_key_preview_migration_resumes_backfill(database_url):
+    api_key = "sk-abcdef123456"
+    
+    async def scenario():
+        db_engine = build_engine(database_url)
+        try:
+            await _interrupt_after(db_engine, 2)
+            # Crashed mid-backfill: the column exists but some previews are missing
+            async with db_engine.begin() as conn:
+                await conn.execute(text(
+                    "INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x')"
+                ))
+                await conn.execute(text(
+                    "INSERT INTO platform_accounts (user_id, platform_id, encrypted_api_key, api_key_preview) "
+                    "VALUES (1, 'openai_free', :key, NULL), (1, 'gemini_free', :key, 'done')"
+                ), {"key": encryption_service.encrypt(api_key)})
+            
+            assert await upgrade_database(db_engine) == LATEST_VERSION
+            async with db_engine.connect() as conn:
+                result = await conn.execute(text(
+                    "SELECT platform_id, api_key_preview FROM platform_accounts ORDER BY id"
+                ))
+                assert result.all() == [
+                    ("openai_free", encryption_service.mask_api_key(api_key)),
+                    ("gemini_free", "done")
+                ]
+        finally:
+            await db_engine.dispose()
+    
+    asyncio.run(scenario())
+
+
+def test_fresh_schema_names_the_quota_unique_index(database_url):
+    async def scenario():
+        db_engine = build_engine(database_url)
+        try:
+            await upgrade_database(db_engine)
+            async with db_engine.connect() as conn:
+                result = await conn.execute(text(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'quotas'"
+                ))
+                return set(result.scalars().all())
+        finally:
+            await db_engine.dispose()
+    
+    indexes = asyncio.run(scenario())
+    # Upgraded databases get this index from migration 2, never an autoindex
+    assert "uq_quotas_account_id_quota_type" in indexes
+    assert not any(name.startswith("sqlite_autoindex") for name in indexes)
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.database import get_db
+from app.main import app
+from app.routers import auth as auth_module
+from app.routers.auth import create_access_token
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+EMAIL = "a@example.com"
+PASSWORD = "correct horse battery staple"
+
+
+def test_operations_beyond_max_pending_are_rejected():
+    hasher = PasswordHasher(workers=1, max_pending=2, queue_timeout=0.1, rounds=4)
+    lock = threading.Lock()
+    state = {"running": 0, "most": 0}
+    
+    def slow(seconds: float):
+        with lock:
+            state["running"] += 1
+            state["most"] = max(state["most"], state["running"])
+        time.sleep(seconds)
+        with lock:
+            state["running"] -= 1
+        return seconds
+    
+    async def scenario():
+        try:
+            return await asyncio.gather(*(hasher._run(slow, 0.2) for _ in range(4)), return_exceptions=True)
+        finally:
+            hasher.shutdown()
+    
+    results = asyncio.run(scenario())
+    
+    # Two run one after the other on the single worker; the rest time out waiting
+    assert results[:2] == [0.2, 0.2]
+    assert all(isinstance(result, PasswordHasherBusy) for result in results[2:])
+    assert state["most"] == 1
+
+
+def test_busy_hasher_answers_503_with_retry_after(session_maker, monkeypatch):
+    async def db():
+        async with session_maker() as session:
+            yield session
+    
+    async def busy(*args):
+        raise PasswordHasherBusy()
+    
+    monkeypatch.setattr(auth_module.password_hasher, "verify", busy)
+    app.dependency_overrides[get_db] = db
+    try:
+        # Without the lifespan, so no background services are started
+        response = TestClient(app).post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    finally:
+        app.dependency_overrides.clear()
+    
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def _p99(latencies):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+def test_login_burst_does_not_slow_down_other_endpoints(db_engine, session_maker, monkeypatch):
+    # Real bcrypt cost, so work on the event loop would stall it for ~100 ms per login
+    hasher = PasswordHasher(workers=2, max_pending=32, queue_timeout=5.0, rounds=11)
+    monkeypatch.setattr(auth_module, "password_hasher", hasher)
+    
+    async def db():
+        async with session_maker() as session:
+            yield session
+    
+    async def scenario():
+        async with db_engine.begin() as conn:
+            await conn.execute(text("UPDATE users SET hashed_password = :hashed WHERE email = :email"), {
+                "hashed": await hasher.hash(PASSWORD), "email": EMAIL
+            })
+        
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': EMAIL})}"}
+        # Without the lifespan, so no background services are started
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            async def get_accounts():
+                started = time.perf_counter()
+                response = await client.get("/api/accounts", headers=headers)
+                assert response.status_code == 200
+                return time.perf_counter() - started
+            
+            async def login():
+                return await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            
+            for _ in range(5):
+                await get_accounts()
+            quiet = [await get_accounts() for _ in range(200)]
+            started = time.perf_counter()
+            logins = asyncio.ensure_future(asyncio.gather(*(login() for _ in range(12))))
+            # Sampled for as long as the burst lasts
+            busy = []
+            while not logins.done():
+                busy.append(await get_accounts())
+            responses = await logins
+            burst_seconds = time.perf_counter() - started
+        return quiet, busy, responses, burst_seconds
+    
+    app.dependency_overrides[get_db] = db
+    try:
+        quiet, busy, responses, burst_seconds = asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+        hasher.shutdown()
+    
+    assert all(response.status_code == 200 for response in responses)
+    print(f"GET /api/accounts p99: {_p99(quiet) * 1000:.1f} ms quiet, {_p99(busy) * 1000:.1f} ms over "
+          f"{len(busy)} requests during a {burst_seconds:.2f} s burst of 12 logins")
+    assert len(busy) >= 100
+    # A single bcrypt verification on the event loop would take ~100 ms
+    assert _p99(busy) < _p99(quiet) + 0.05
@@ -0,0 +1,25 @@
+import json
+import os
+from datetime import timedelta
+
+from app.services.platform_catalog import PlatformCatalog
+
+
+def _write_catalog(path, reset_hours, mtime):
+    path.write_text(json.dumps({"platforms": [
+        {"id": "openai_free", "quotas": [{"type": "requests", "limit": 100, "reset_hours": reset_hours}]}
+    ]}))
+    os.utime(path, (mtime, mtime))
+
+
+def test_invalid_reload_keeps_the_previous_catalog(tmp_path):
+    path = tmp_path / "platform_quotas.json"
+    _write_catalog(path, 24, mtime=1_000)
+    catalog = PlatformCatalog(path, check_interval=0)
+    
+    # timedelta() rejects a string with TypeError
+    _write_catalog(path, "daily", mtime=2_000)
+    assert catalog.get_reset_period("openai_free", "requests") == timedelta(hours=24)
+    
+    _write_catalog(path, 12, mtime=3_000)
+    assert catalog.get_reset_period("openai_free", "requests") == timedelta(hours=12)
@@ -0,0 +1,140 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services.http_client import http_client
+from app.services.platform_verifier import OpenAIProbe, PlatformProbe, PlatformVerifier
+
+FAKE_PLATFORM = "http://fake-platform.test"
+
+
+class FakePlatform:
+    """Stands in for a platform API: answers each key with a fixed status"""
+    
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+    
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        
+        api_key = request.headers["Authorization"].removeprefix("Bearer ")
+        outcome = self.statuses[api_key]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={"data": []})
+
+
+@pytest.fixture
+def fake_platform(monkeypatch):
+    """Route the shared HTTP client and the openai_free probe to a FakePlatform"""
+    platform = FakePlatform({})
+    monkeypatch.setattr(settings, "platform_api_base_urls", {"openai_free": FAKE_PLATFORM})
+    monkeypatch.setattr(http_client, "max_retries", 0)
+    monkeypatch.setattr(http_client, "_host_slots", {})
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(platform)))
+    return platform
+
+
+def _make_verifier(max_concurrency: int = 10) -> PlatformVerifier:
+    verifier = PlatformVerifier(max_concurrency=max_concurrency, cache_ttl=60.0)
+    verifier.register_probe(OpenAIProbe("openai_free"))
+    return verifier
+
+
+def _verify(verifier: PlatformVerifier, *calls):
+    async def scenario():
+        return [await verifier.verify(*call) for call in calls]
+    
+    return asyncio.run(scenario())
+
+
+def test_accepted_key_is_verified_and_cached(fake_platform):
+    fake_platform.statuses["sk-good"] = 200
+    
+    first, second = _verify(_make_verifier(), (1, "openai_free", "sk-good"), (1, "openai_free", "sk-good"))
+    
+    assert (first["success"], first["definitive"], first["cached"]) == (True, True, False)
+    assert (second["success"], second["cached"]) == (True, True)
+    assert len(fake_platform.requests) == 1
+    assert str(fake_platform.requests[0].url) == f"{FAKE_PLATFORM}/v1/models"
+
+
+def test_rejected_key_is_a_definitive_failure(fake_platform):
+    fake_platform.statuses["sk-revoked"] = 401
+    
+    first, second = _verify(_make_verifier(), (1, "openai_free", "sk-revoked"), (1, "openai_free", "sk-revoked"))
+    
+    assert (first["success"], first["definitive"]) == (False, True)
+    assert first["details"]["status_code"] == 401
+    assert second["cached"]
+    assert len(fake_platform.requests) == 1
+
+
+def test_transient_failures_are_not_cached(fake_platform):
+    fake_platform.statuses["sk-flaky"] = 500
+    request = httpx.Request("GET", FAKE_PLATFORM)
+    fake_platform.statuses["sk-offline"] = httpx.ConnectError("refused", request=request)
+    
+    results = _verify(
+        _make_verifier(),
+        (1, "openai_free", "sk-flaky"),
+        (1, "openai_free", "sk-flaky"),
+        (2, "openai_free", "sk-offline")
+    )
+    
+    assert [(result["success"], result["definitive"], result["cached"]) for result in results] == [
+        (False, False, False),
+        (False, False, False),
+        (False, False, False)
+    ]
+    assert results[2]["message"] == "Platform unreachable: ConnectError"
+    assert len(fake_platform.requests) == 3
+
+
+def test_a_new_key_is_verified_again(fake_platform):
+    fake_platform.statuses.update({"sk-old": 200, "sk-new": 401})
+    
+    old, new = _verify(_make_verifier(), (1, "openai_free", "sk-old"), (1, "openai_free", "sk-new"))
+    
+    assert old["success"] and not new["success"]
+    assert not new["cached"]
+
+
+def test_empty_keys_and_platforms_without_a_probe_need_no_request(fake_platform):
+    empty, unprobed = _verify(_make_verifier(), (1, "openai_free", ""), (2, "unknown_platform", "sk-any"))
+    
+    assert (empty["success"], empty["definitive"]) == (False, True)
+    assert unprobed["success"]
+    assert fake_platform.requests == []
+
+
+def test_verify_many_runs_probes_in_parallel_within_the_bound(fake_platform):
+    accounts = [(account_id, "openai_free", f"sk-{account_id}") for account_id in range(8)]
+    fake_platform.statuses.update({api_key: 200 for _, _, api_key in accounts})
+    verifier = _make_verifier(max_concurrency=3)
+    
+    async def scenario():
+        return [result async for result in verifier.verify_many(accounts)]
+    
+    results = asyncio.run(scenario())
+    
+    assert sorted(result["account_id"] for result in results) == list(range(8))
+    assert all(result["success"] for result in results)
+    assert fake_platform.peak == 3
+
+
+def test_probe_without_a_request_cannot_be_registered():
+    class IncompleteProbe(PlatformProbe):
+        default_base_url = FAKE_PLATFORM
+    
+    with pytest.raises(TypeError):
+        _make_verifier().register_probe(IncompleteProbe("openai_free"))
@@ -0,0 +1,89 @@
+import re
+import sqlite3
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from app.database import engine
+from app.main import app
+from app.services.platform_verifier import platform_verifier
+
+# A SCAN step that walks a table instead of an index
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(?!.*USING (COVERING )?INDEX)")
+
+
+async def _verified(account_id: int, platform_id: str, api_key: str):
+    return {
+        "success": True,
+        "message": "Account verified successfully",
+        "details": None,
+        "definitive": True,
+        "account_id": account_id,
+        "cached": False
+    }
+
+
+def _exercise_endpoints(client: TestClient):
+    """Call every endpoint that queries the database"""
+    response = client.post("/api/auth/register", json={"email": "plans@example.com", "password": "pw123456"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    client.post("/api/auth/login", json={"email": "plans@example.com", "password": "pw123456"})
+    client.get("/api/auth/me", headers=headers)
+    client.patch("/api/auth/me", json={"timezone": "Asia/Seoul"}, headers=headers)
+    
+    account_id = client.post(
+        "/api/accounts", json={"platform_id": "gemini_free", "api_key": "sk-abcdef123456"}, headers=headers
+    ).json()["id"]
+    client.post("/api/accounts/bulk", json={"accounts": [
+        {"platform_id": "openai_free", "api_key": "sk-abcdef123456"},
+        {"platform_id": "claude_free", "api_key": "sk-abcdef123456"}
+    ]}, headers=headers)
+    client.get("/api/accounts", headers=headers)
+    client.get(f"/api/accounts/{account_id}", headers=headers)
+    client.post(f"/api/accounts/{account_id}/verify", headers=headers)
+    client.post("/api/accounts/verify-all", headers=headers)
+    
+    client.post("/api/route", json={"amount": 1}, headers=headers)
+    client.post("/api/usage/events", json={"events": [
+        {"account_id": account_id, "amount": 2, "idempotency_key": "plans-1"}
+    ]}, headers=headers)
+    client.get("/api/quota/dashboard", headers=headers)
+    client.get("/api/quota/recommendations", headers=headers)
+    client.get("/api/quota/schedule", headers=headers)
+    client.get(f"/api/quota/{account_id}", headers=headers)
+    client.delete(f"/api/accounts/{account_id}", headers=headers)
+
+
+def test_endpoint_queries_use_indexes(monkeypatch):
+    monkeypatch.setattr(platform_verifier, "verify", _verified)
+    statements = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # Plain INSERTs don't read any table
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters[0] if executemany else parameters))
+    
+    client = TestClient(app)
+    client.__enter__()
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        _exercise_endpoints(client)
+    finally:
+        # Shutdown flushes buffered usage, so keep capturing until it is done
+        try:
+            client.__exit__(None, None, None)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    
+    assert statements
+    conn = sqlite3.connect(make_url(str(engine.url)).database)
+    try:
+        scans = []
+        for statement, parameters in statements:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            scans.extend((detail, statement) for _, _, _, detail in plan if FULL_SCAN.match(detail))
+    finally:
+        conn.close()
+    
+    assert scans == []
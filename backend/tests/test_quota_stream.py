@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.routers import quota as quota_module
+from app.routers.auth import create_access_token
+from app.services.quota_stream import quota_stream_hub
+from app.services.recommendation_engine import recommendation_engine
+
+USER_ID = 1
+GEMINI_ACCOUNT_ID = 2
+
+
+class _StreamClient:
+    """Calls the app over raw ASGI, so the response can be read while it streams and then disconnected"""
+    
+    def __init__(self, path: str, headers: dict):
+        self.scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+            "client": ("test", 1),
+            "server": ("test", 80)
+        }
+        self.status = None
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self._requested = False
+        self._disconnected = asyncio.Event()
+        self._buffer = ""
+        self._task = None
+    
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+    
+    async def _send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            await self.chunks.put(message["body"].decode())
+    
+    def open(self):
+        self._task = asyncio.create_task(app(self.scope, self._receive, self._send))
+    
+    async def next_event(self):
+        """The next (event, data) of the stream, skipping keep-alive comments"""
+        while True:
+            while "\n\n" not in self._buffer:
+                self._buffer += await asyncio.wait_for(self.chunks.get(), timeout=5)
+            block, self._buffer = self._buffer.split("\n\n", 1)
+            if block.startswith(":"):
+                continue
+            fields = dict(line.split(": ", 1) for line in block.split("\n"))
+            return fields["event"], json.loads(fields["data"])
+    
+    async def disconnect(self):
+        self._disconnected.set()
+        await asyncio.wait_for(self._task, timeout=5)
+
+
+def test_stream_sends_snapshot_then_usage_and_unsubscribes(session_maker, idle_usage_buffer, monkeypatch):
+    async def db():
+        async with session_maker() as session:
+            yield session
+    
+    monkeypatch.setattr(quota_module, "read_session_maker", session_maker)
+    monkeypatch.setattr(settings, "quota_stream_min_interval_seconds", 0.01)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'a@example.com'})}"}
+    
+    async def scenario():
+        stream = _StreamClient("/api/quota/stream", headers)
+        stream.open()
+        
+        event, data = await stream.next_event()
+        assert stream.status == 200
+        assert event == "snapshot"
+        assert sorted(account["account_id"] for account in data["accounts"]) == [1, GEMINI_ACCOUNT_ID]
+        assert USER_ID in quota_stream_hub._subscriptions
+        
+        idle_usage_buffer.record(USER_ID, GEMINI_ACCOUNT_ID, 3.0)
+        event, data = await stream.next_event()
+        assert event == "quota"
+        assert data["account_id"] == GEMINI_ACCOUNT_ID
+        assert [quota["used_quota"] for quota in data["quotas"]] == [3.0, 3.0]
+        
+        await stream.disconnect()
+        assert USER_ID not in quota_stream_hub._subscriptions
+    
+    app.dependency_overrides[get_db] = db
+    recommendation_engine.invalidate(USER_ID)
+    try:
+        asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+        recommendation_engine.invalidate(USER_ID)
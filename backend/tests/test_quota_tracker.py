@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.services.platform_catalog import platform_catalog
+from app.services.quota_tracker import quota_tracker
+
+ACCOUNT_ID = 1  # openai_free, one 3-hour quota
+INCREMENTS = 2000
+
+
+async def _increment_concurrently(session_maker, count: int):
+    async def increment():
+        async with session_maker() as db:
+            await quota_tracker.update_usage(db, ACCOUNT_ID, 1.0)
+    
+    await asyncio.gather(*(increment() for _ in range(count)))
+
+
+async def _quota_row(db_engine):
+    async with db_engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT used_quota, reset_at FROM quotas WHERE account_id = :account_id"
+        ), {"account_id": ACCOUNT_ID})
+        used_quota, reset_at = result.one()
+    return used_quota, datetime.fromisoformat(reset_at)
+
+
+def test_concurrent_increments_are_not_lost(db_engine, session_maker):
+    async def scenario():
+        await _increment_concurrently(session_maker, INCREMENTS)
+        
+        used_quota, _ = await _quota_row(db_engine)
+        assert used_quota == float(INCREMENTS)
+    
+    asyncio.run(scenario())
+
+
+def test_concurrent_increments_roll_an_expired_window_once(db_engine, session_maker):
+    period = platform_catalog.get_reset_period("openai_free", "3hour")
+    expired_at = datetime.utcnow() - timedelta(minutes=5)
+    
+    async def scenario():
+        async with db_engine.begin() as conn:
+            await conn.execute(text(
+                "UPDATE quotas SET used_quota = 40, reset_at = :reset_at WHERE account_id = :account_id"
+            ), {"reset_at": expired_at, "account_id": ACCOUNT_ID})
+        
+        await _increment_concurrently(session_maker, 500)
+        
+        used_quota, reset_at = await _quota_row(db_engine)
+        # The old window's 40 are gone and every increment landed in the new one
+        assert used_quota == 500.0
+        assert reset_at == expired_at + period
+    
+    asyncio.run(scenario())
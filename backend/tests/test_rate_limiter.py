@@ -0,0 +1,46 @@
+import math
+
+from app.services.rate_limiter import RateLimiter
+
+ACCOUNT_ID = 1
+# 60 requests per minute (and a daily quota the limiter leaves alone)
+PLATFORM_ID = "gemini_free"
+
+
+def test_acquire_admits_up_to_the_limit():
+    limiter = RateLimiter()
+    for _ in range(60):
+        assert limiter.acquire(ACCOUNT_ID, PLATFORM_ID)[0]
+    
+    allowed, retry_after = limiter.acquire(ACCOUNT_ID, PLATFORM_ID)
+    assert not allowed
+    assert 0 < retry_after <= 60
+
+
+def test_recorded_usage_counts_against_the_limit():
+    limiter = RateLimiter()
+    limiter.record(ACCOUNT_ID, PLATFORM_ID, 60.0)
+    
+    assert not limiter.acquire(ACCOUNT_ID, PLATFORM_ID)[0]
+    assert limiter.acquire(ACCOUNT_ID + 1, PLATFORM_ID)[0]
+
+
+def test_record_keeps_late_reports_in_time_order():
+    limiter = RateLimiter()
+    limiter.record(ACCOUNT_ID, PLATFORM_ID, 30.0, age_seconds=10.0)
+    limiter.record(ACCOUNT_ID, PLATFORM_ID, 30.0, age_seconds=50.0)
+    # Usage older than the window is ignored
+    limiter.record(ACCOUNT_ID, PLATFORM_ID, 30.0, age_seconds=120.0)
+    
+    allowed, retry_after = limiter.check(ACCOUNT_ID, PLATFORM_ID)
+    assert not allowed
+    # The older report leaves the window first, about 10 seconds from now
+    assert 9 < retry_after <= 10
+
+
+def test_amount_over_the_limit_never_fits():
+    limiter = RateLimiter()
+    
+    assert limiter.acquire(ACCOUNT_ID, PLATFORM_ID, 61.0) == (False, math.inf)
+    # Nothing was recorded, so smaller requests still go through
+    assert limiter.acquire(ACCOUNT_ID, PLATFORM_ID, 60.0)[0]
@@ -0,0 +1,186 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import text
+
+from app.services import recommendation_engine as recommendation_engine_module
+from app.services import usage_buffer as usage_buffer_module
+from app.services.etags import user_versions
+from app.services.platform_catalog import platform_catalog
+from app.services.quota_stream import quota_stream_hub
+from app.services.quota_tracker import quota_tracker
+from app.services.recommendation_engine import RecommendationEngine
+from app.services.usage_buffer import UsageBuffer
+
+USER_ID = 1
+GEMINI_ACCOUNT_ID = 2
+
+
+def test_current_quotas_resets_windows_that_passed():
+    now = datetime.utcnow()
+    period = platform_catalog.get_reset_period("gemini_free", "minute")
+    snapshot = {
+        "accounts": [SimpleNamespace(id=GEMINI_ACCOUNT_ID, platform_id="gemini_free")],
+        "quotas_by_account": {GEMINI_ACCOUNT_ID: [
+            quota_tracker.build_status("minute", 60.0, 30.0, now - timedelta(seconds=5)),
+            quota_tracker.build_status("daily", 1500.0, 30.0, now + timedelta(hours=1)),
+        ]}
+    }
+    
+    minute, daily = RecommendationEngine().current_quotas(snapshot)[GEMINI_ACCOUNT_ID]
+    
+    assert minute["used_quota"] == 0.0
+    assert minute["reset_at"] == now - timedelta(seconds=5) + period
+    assert daily["used_quota"] == 30.0
+    # The snapshot itself is left alone
+    assert snapshot["quotas_by_account"][GEMINI_ACCOUNT_ID][0]["used_quota"] == 30.0
+
+
+def test_resets_are_announced_without_reloading(db_engine, session_maker, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(recommendation_engine_module, "async_session_maker", session_maker)
+        async with db_engine.begin() as conn:
+            await conn.execute(text(
+                "UPDATE quotas SET used_quota = 5, reset_at = :reset_at "
+                "WHERE account_id = :account_id AND quota_type = 'minute'"
+            ), {"reset_at": datetime.utcnow() + timedelta(seconds=0.3), "account_id": GEMINI_ACCOUNT_ID})
+        
+        engine = RecommendationEngine()
+        loads = []
+        load = engine._load
+        
+        async def counting_load(db, user_ids):
+            loads.append(list(user_ids))
+            return await load(db, user_ids)
+        
+        monkeypatch.setattr(engine, "_load", counting_load)
+        version = user_versions.get(USER_ID)
+        engine.start()
+        try:
+            await asyncio.sleep(0.8)
+            
+            assert loads == [[USER_ID]]
+            assert user_versions.get(USER_ID) == version + 1
+            async with session_maker() as db:
+                snapshot = await engine.get_snapshot(db, USER_ID)
+            minute = engine.current_quotas(snapshot)[GEMINI_ACCOUNT_ID][0]
+            assert (minute["quota_type"], minute["used_quota"]) == ("minute", 0.0)
+            # Nothing has usage any more, so nothing is left to wake up for
+            assert engine._scheduled == set()
+        finally:
+            await engine.stop()
+    
+    asyncio.run(scenario())
+
+
+def test_engine_restarts_on_a_new_event_loop(db_engine, session_maker, monkeypatch):
+    monkeypatch.setattr(recommendation_engine_module, "async_session_maker", session_maker)
+    engine = RecommendationEngine()
+    
+    async def idle_run():
+        engine.start()
+        await asyncio.sleep(0.05)
+        await engine.stop()
+    
+    async def run_with_reset():
+        async with db_engine.begin() as conn:
+            await conn.execute(text(
+                "UPDATE quotas SET used_quota = 5, reset_at = :reset_at "
+                "WHERE account_id = :account_id AND quota_type = 'minute'"
+            ), {"reset_at": datetime.utcnow() + timedelta(seconds=0.3), "account_id": GEMINI_ACCOUNT_ID})
+        version = user_versions.get(USER_ID)
+        engine.start()
+        try:
+            await asyncio.sleep(0.8)
+            return user_versions.get(USER_ID) - version
+        finally:
+            await engine.stop()
+    
+    # Each asyncio.run is a new event loop, like a second app lifespan
+    asyncio.run(idle_run())
+    assert asyncio.run(run_with_reset()) == 1
+
+
+def test_flushed_usage_announces_its_reset(db_engine, session_maker, monkeypatch):
+    engine = RecommendationEngine()
+    monkeypatch.setattr(recommendation_engine_module, "async_session_maker", session_maker)
+    monkeypatch.setattr(usage_buffer_module, "async_session_maker", session_maker)
+    monkeypatch.setattr(usage_buffer_module, "recommendation_engine", engine)
+    buffer = UsageBuffer(
+        max_batch_size=100,
+        flush_interval=0.01,
+        idempotency_ttl=60.0,
+        max_idempotency_keys=100,
+        max_retries=0,
+        retry_backoff=0.01
+    )
+    
+    async def scenario():
+        reset_at = datetime.utcnow() + timedelta(seconds=1)
+        async with db_engine.begin() as conn:
+            await conn.execute(text(
+                "UPDATE quotas SET reset_at = :reset_at WHERE account_id = :account_id AND quota_type = 'minute'"
+            ), {"reset_at": reset_at, "account_id": GEMINI_ACCOUNT_ID})
+        
+        engine.start()
+        subscription = quota_stream_hub.subscribe(USER_ID)
+        try:
+            await asyncio.sleep(0.1)
+            # Usage recorded while no snapshot is loaded
+            engine.invalidate(USER_ID)
+            buffer.start()
+            buffer.record(USER_ID, GEMINI_ACCOUNT_ID, 5.0)
+            await buffer.stop()
+            subscription.take_changes()
+            version = user_versions.get(USER_ID)
+            
+            assert (USER_ID, reset_at) in engine._scheduled
+            await asyncio.sleep((reset_at - datetime.utcnow()).total_seconds() + 0.3)
+            
+            assert subscription.take_changes() == (True, set())
+            assert user_versions.get(USER_ID) == version + 1
+        finally:
+            quota_stream_hub.unsubscribe(USER_ID, subscription)
+            await engine.stop()
+    
+    asyncio.run(scenario())
+
+
+def test_flushed_usage_updates_the_snapshot_in_place(session_maker, monkeypatch):
+    engine = RecommendationEngine()
+    monkeypatch.setattr(usage_buffer_module, "async_session_maker", session_maker)
+    monkeypatch.setattr(usage_buffer_module, "recommendation_engine", engine)
+    buffer = UsageBuffer(
+        max_batch_size=100,
+        flush_interval=0.01,
+        idempotency_ttl=60.0,
+        max_idempotency_keys=100,
+        max_retries=0,
+        retry_backoff=0.01
+    )
+    loads = []
+    load = engine._load
+    
+    async def counting_load(db, user_ids):
+        loads.append(list(user_ids))
+        return await load(db, user_ids)
+    
+    monkeypatch.setattr(engine, "_load", counting_load)
+    
+    async def scenario():
+        async with session_maker() as db:
+            await engine.get_snapshot(db, USER_ID)
+            buffer.start()
+            buffer.record(USER_ID, GEMINI_ACCOUNT_ID, 5.0)
+            buffer.record(USER_ID, 1, 3.0)
+            await buffer.stop()
+            
+            snapshot = await engine.get_snapshot(db, USER_ID)
+            stored = await quota_tracker.get_quota_status_many(db, [1, GEMINI_ACCOUNT_ID])
+        
+        assert loads == [[USER_ID]]
+        assert engine.current_quotas(snapshot) == stored
+        assert [quota["used_quota"] for quota in stored[GEMINI_ACCOUNT_ID]] == [5.0, 5.0]
+    
+    asyncio.run(scenario())
@@ -0,0 +1,71 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.responses import ORJSON_AVAILABLE, FastJSONResponse
+from app.schemas.quota import DashboardResponse, PlatformQuotaInfo
+from app.services.quota_tracker import quota_tracker
+
+ACCOUNTS = 60
+
+
+def _dashboard_platforms(now: datetime):
+    return [
+        {
+            "platform_id": "gemini_free",
+            "platform_name": "Gemini Free",
+            "account_id": account_id,
+            "quotas": [
+                {**quota_tracker.build_status("minute", 60.0, account_id % 60, now + timedelta(seconds=30)),
+                 "predicted_utilization": 42.5, "predicted_waste": 12.0},
+                {**quota_tracker.build_status("daily", 1500.0, account_id * 7.5, now + timedelta(hours=5)),
+                 "predicted_utilization": 80.25, "predicted_waste": 300.0}
+            ],
+            "urgency_score": 55.17,
+            "recommendation": "Available",
+            "time_until_reset": "5 hours",
+            "most_urgent_quota": None
+        }
+        for account_id in range(ACCOUNTS)
+    ]
+
+
+def _fastest(render) -> float:
+    timings = []
+    for _ in range(50):
+        started = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def test_dashboard_serialization_for_60_accounts():
+    now = datetime(2024, 1, 1, 12, 0, 0, 123456)
+    platforms = _dashboard_platforms(now)
+    fields = {
+        "total_platforms": 6,
+        "connected_accounts": ACCOUNTS,
+        "total_quota_usage_percentage": 12.5,
+        "last_updated": now
+    }
+    
+    def before() -> bytes:
+        # What FastAPI does with a response_model: validate, encode, dump
+        dashboard = DashboardResponse(platforms=[PlatformQuotaInfo(**platform) for platform in platforms], **fields)
+        return JSONResponse(jsonable_encoder(dashboard)).body
+    
+    def after() -> bytes:
+        dashboard = DashboardResponse.model_construct(
+            platforms=[PlatformQuotaInfo.model_construct(**platform) for platform in platforms], **fields
+        )
+        return FastJSONResponse(dashboard).body
+    
+    assert json.loads(after()) == json.loads(before())
+    
+    before_seconds, after_seconds = _fastest(before), _fastest(after)
+    print(f"dashboard, {ACCOUNTS} accounts: {before_seconds * 1000:.2f} ms validated, "
+          f"{after_seconds * 1000:.2f} ms with FastJSONResponse (orjson: {ORJSON_AVAILABLE})")
+    assert after_seconds < before_seconds
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+
+from app.database import get_read_db
+from app.main import app
+from app.routers.auth import create_access_token
+from app.services.rate_limiter import rate_limiter
+from app.services.recommendation_engine import recommendation_engine
+
+USER_ID = 1
+GEMINI_ACCOUNT_ID = 2  # 60 requests per minute
+
+
+def test_amount_over_every_rate_limit_is_a_bad_request(session_maker, idle_usage_buffer):
+    async def read_db():
+        async with session_maker() as session:
+            yield session
+    
+    # Without the lifespan, so no background services are started
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'a@example.com'})}"}
+    app.dependency_overrides[get_read_db] = read_db
+    recommendation_engine.invalidate(USER_ID)
+    try:
+        too_large = client.post("/api/route", json={"amount": 61, "platform_id": "gemini_free"}, headers=headers)
+        fits = client.post("/api/route", json={"amount": 60, "platform_id": "gemini_free"}, headers=headers)
+        limited = client.post("/api/route", json={"amount": 1, "platform_id": "gemini_free"}, headers=headers)
+    finally:
+        app.dependency_overrides.clear()
+        rate_limiter.forget(GEMINI_ACCOUNT_ID)
+        recommendation_engine.invalidate(USER_ID)
+    
+    assert too_large.status_code == 400
+    assert "Retry-After" not in too_large.headers
+    assert fits.status_code == 200
+    assert limited.status_code == 429
+    assert 1 <= int(limited.headers["Retry-After"]) <= 60
@@ -0,0 +1,166 @@
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import quota_optimizer as quota_optimizer_module
+from app.services import schedule_solver as schedule_solver_module
+from app.services.quota_optimizer import quota_optimizer
+from app.services.quota_tracker import quota_tracker
+from app.services.schedule_solver import ScheduleSolver
+from app.services.usage_rate import UsageRateEstimator
+
+START = datetime(2024, 1, 1)
+# Candidate amounts per (account, slot) tried by the brute force
+MAX_AMOUNT = 4
+
+
+@pytest.fixture
+def reset_periods(monkeypatch):
+    """Reset period of each test platform's single quota, by platform id"""
+    periods = {}
+    monkeypatch.setattr(
+        schedule_solver_module.platform_catalog,
+        "get_reset_period",
+        lambda platform_id, quota_type: periods[platform_id]
+    )
+    return periods
+
+
+def _brute_force(accounts, slots, demand) -> float:
+    """Largest total usage over every integer allocation"""
+    best = 0
+    slot_count = len(slots)
+    for amounts in itertools.product(range(MAX_AMOUNT + 1), repeat=len(accounts) * slot_count):
+        if any(sum(amounts[a * slot_count + s] for a in range(len(accounts))) > demand for s in range(slot_count)):
+            continue
+        
+        feasible = True
+        for a, (total, remaining, reset_at, period) in enumerate(accounts):
+            used_by_window = {}
+            for s, (_, start, _) in enumerate(slots):
+                window = 0 if start < reset_at else (start - reset_at) // period + 1
+                used_by_window[window] = used_by_window.get(window, 0) + amounts[a * slot_count + s]
+            if any(used > (remaining if window == 0 else total) for window, used in used_by_window.items()):
+                feasible = False
+                break
+        if feasible:
+            best = max(best, sum(amounts))
+    return best
+
+
+def test_greedy_matches_brute_force_for_single_quota_accounts(reset_periods):
+    solver = ScheduleSolver()
+    rng = random.Random(1)
+    
+    for _ in range(60):
+        account_count = rng.choice([1, 2])
+        slot_count = 3 if account_count == 2 else 4
+        # Hour-long slots, and resets on the hour, so no reset falls inside a slot
+        slots = [
+            (str(i), START + timedelta(hours=i), START + timedelta(hours=i + 1))
+            for i in range(slot_count)
+        ]
+        
+        accounts, platform_accounts, quotas_by_account = [], [], {}
+        for account_id in range(account_count):
+            period = timedelta(hours=rng.choice([1, 2, 3]))
+            reset_at = START + timedelta(hours=rng.randint(1, 3))
+            total = rng.randint(1, MAX_AMOUNT)
+            remaining = rng.randint(0, total)
+            
+            platform_id = f"platform_{account_id}"
+            reset_periods[platform_id] = period
+            accounts.append((total, remaining, reset_at, period))
+            platform_accounts.append(SimpleNamespace(id=account_id, platform_id=platform_id))
+            quotas_by_account[account_id] = [{
+                "quota_type": "daily",
+                "total_quota": float(total),
+                "remaining_quota": float(remaining),
+                "reset_at": reset_at
+            }]
+        demand = rng.randint(1, MAX_AMOUNT)
+        
+        allocations = solver.solve(platform_accounts, quotas_by_account, slots, demand)
+        
+        assert sum(allocation["amount"] for allocation in allocations) == _brute_force(accounts, slots, demand)
+
+
+def test_solves_50_accounts_in_milliseconds(reset_periods):
+    solver = ScheduleSolver()
+    reset_periods.update({
+        "platform_0": timedelta(hours=3),
+        "platform_1": timedelta(hours=24),
+        "platform_2": timedelta(minutes=1)
+    })
+    now = datetime(2024, 1, 1, 5, 30)
+    accounts = [SimpleNamespace(id=i, platform_id=f"platform_{i % 3}") for i in range(50)]
+    quotas_by_account = {
+        account.id: [{
+            "quota_type": "daily",
+            "total_quota": 50.0,
+            "remaining_quota": 20.0,
+            "reset_at": now + timedelta(hours=1)
+        }]
+        for account in accounts
+    }
+    slots = solver.build_slots(now, "Asia/Seoul")
+    
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        allocations = solver.solve(accounts, quotas_by_account, slots, 200.0)
+        timings.append(time.perf_counter() - started)
+    
+    assert allocations
+    # Typically a few milliseconds; generous to stay stable on slow machines
+    assert min(timings) < 0.05
+
+
+def test_fractional_demand_is_planned_in_whole_units(reset_periods):
+    solver = ScheduleSolver()
+    reset_periods["platform_0"] = timedelta(days=30)
+    account = SimpleNamespace(id=0, platform_id="platform_0")
+    quotas_by_account = {0: [{
+        "quota_type": "monthly",
+        "total_quota": 100.0,
+        "remaining_quota": 100.0,
+        "reset_at": START + timedelta(days=30)
+    }]}
+    slots = [(str(i), START + timedelta(hours=i), START + timedelta(hours=i + 1)) for i in range(4)]
+    
+    allocations = solver.solve([account], quotas_by_account, slots, 0.5)
+    
+    assert [(allocation["time_slot"], allocation["amount"]) for allocation in allocations] == [("1", 1.0), ("3", 1.0)]
+
+
+def test_schedule_plans_demand_per_unit(monkeypatch):
+    now = datetime(2024, 1, 1, 9, 0)
+    estimator = UsageRateEstimator(half_life_hours=6.0)
+    monkeypatch.setattr(quota_optimizer_module, "usage_rate_estimator", estimator)
+    chatgpt = SimpleNamespace(id=1, platform_id="openai_free")  # 50 messages per 3 hours
+    gemini = SimpleNamespace(id=2, platform_id="gemini_free")  # requests
+    quotas_by_account = {
+        chatgpt.id: [quota_tracker.build_status("3hour", 50.0, 0.0, now + timedelta(hours=3))],
+        gemini.id: [
+            quota_tracker.build_status("minute", 60.0, 0.0, now + timedelta(minutes=1)),
+            quota_tracker.build_status("daily", 1500.0, 0.0, now + timedelta(hours=12))
+        ]
+    }
+    # A fresh ChatGPT user, and steady Gemini use of about 23 requests an hour
+    estimator.observe(chatgpt.id, 4.0, now)
+    estimator.observe(gemini.id, 200.0, now)
+    
+    schedule = quota_optimizer.build_daily_schedule([chatgpt, gemini], quotas_by_account, "UTC", now)
+    
+    assert all(entry["amount"] == int(entry["amount"]) for entry in schedule)
+    # Too little history to tell: planned up to capacity, whatever Gemini's rate
+    chatgpt_amounts = [entry["amount"] for entry in schedule if entry["account_id"] == chatgpt.id]
+    assert chatgpt_amounts and set(chatgpt_amounts) == {50.0}
+    assert all(entry["action"] == "Use up to 50 messages" for entry in schedule if entry["account_id"] == chatgpt.id)
+    # Gemini gets its own demand of about 69 requests per 3-hour slot
+    gemini_amounts = [entry["amount"] for entry in schedule if entry["account_id"] == gemini.id]
+    assert gemini_amounts and all(0 < amount <= 70 for amount in gemini_amounts)
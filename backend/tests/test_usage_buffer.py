@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.services import usage_buffer as usage_buffer_module
+from app.services.quota_tracker import quota_tracker
+from app.services.usage_buffer import UsageBuffer
+
+ACCOUNT_ID = 1
+
+
+def _failing_session_maker(session_maker, failures: int):
+    """Session factory whose first `failures` sessions fail like a locked database"""
+    calls = {"count": 0}
+    
+    def factory():
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise RuntimeError("database is locked")
+        return session_maker()
+    
+    return factory
+
+
+def _make_buffer(max_retries: int) -> UsageBuffer:
+    return UsageBuffer(
+        max_batch_size=100,
+        flush_interval=0.01,
+        idempotency_ttl=60.0,
+        max_idempotency_keys=100,
+        max_retries=max_retries,
+        retry_backoff=0.01
+    )
+
+
+async def _stored_usage(db_engine):
+    async with db_engine.connect() as conn:
+        logged = (await conn.execute(text("SELECT COALESCE(SUM(amount), 0) FROM usage_logs"))).scalar()
+        used = (await conn.execute(text(
+            "SELECT MAX(used_quota) FROM quotas WHERE account_id = :account_id"
+        ), {"account_id": ACCOUNT_ID})).scalar()
+    return logged, used
+
+
+def test_failed_flush_is_retried_until_written(db_engine, session_maker, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(usage_buffer_module, "async_session_maker", _failing_session_maker(session_maker, 2))
+        buffer = _make_buffer(max_retries=3)
+        buffer.start()
+        buffer.record(1, ACCOUNT_ID, 5.0, idempotency_key="event-1")
+        await buffer.stop()
+        
+        assert await _stored_usage(db_engine) == (5.0, 5.0)
+        assert ACCOUNT_ID not in quota_tracker.pending_usage
+        assert buffer.recent_keys.get((1, "event-1")) is True
+    
+    asyncio.run(scenario())
+
+
+def test_batch_stays_pending_while_retrying(db_engine, session_maker, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(usage_buffer_module, "async_session_maker", _failing_session_maker(session_maker, 1))
+        buffer = _make_buffer(max_retries=3)
+        buffer.retry_backoff = 0.2
+        buffer.start()
+        buffer.record(1, ACCOUNT_ID, 2.0)
+        await asyncio.sleep(0.1)
+        # First attempt failed; the amount still counts towards the quota
+        assert quota_tracker.pending_usage.get(ACCOUNT_ID) == 2.0
+        await buffer.stop()
+        
+        assert await _stored_usage(db_engine) == (2.0, 2.0)
+        assert ACCOUNT_ID not in quota_tracker.pending_usage
+    
+    asyncio.run(scenario())
+
+
+def test_batch_is_dropped_after_max_retries(db_engine, session_maker, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(usage_buffer_module, "async_session_maker", _failing_session_maker(session_maker, 3))
+        buffer = _make_buffer(max_retries=2)
+        buffer.start()
+        buffer.record(1, ACCOUNT_ID, 5.0, idempotency_key="event-1")
+        await buffer.stop()
+        
+        assert await _stored_usage(db_engine) == (0.0, 0.0)
+        assert ACCOUNT_ID not in quota_tracker.pending_usage
+        # The client may send the event again under the same key
+        assert buffer.recent_keys.get((1, "event-1")) is None
+    
+    asyncio.run(scenario())
+
+
+def test_buffer_restarts_on_a_new_event_loop(db_engine, session_maker, monkeypatch):
+    monkeypatch.setattr(usage_buffer_module, "async_session_maker", session_maker)
+    buffer = _make_buffer(max_retries=0)
+    
+    async def run_once(amount: float):
+        # Each asyncio.run is a new event loop, like a second app lifespan
+        buffer.start()
+        # Let the flush task wait on the queue before anything arrives
+        await asyncio.sleep(0.01)
+        buffer.record(1, ACCOUNT_ID, amount)
+        await buffer.stop()
+    
+    asyncio.run(run_once(3.0))
+    asyncio.run(run_once(4.0))
+    assert asyncio.run(_stored_usage(db_engine)) == (7.0, 7.0)
+
+
+def test_late_events_only_count_towards_the_windows_they_happened_in(db_engine, session_maker, monkeypatch):
+    gemini_account_id = 2  # a per-minute and a daily quota
+    now = datetime.utcnow()
+    
+    async def scenario():
+        async with db_engine.begin() as conn:
+            for quota_type, reset_at in (("minute", now + timedelta(seconds=30)), ("daily", now + timedelta(hours=12))):
+                await conn.execute(text(
+                    "UPDATE quotas SET reset_at = :reset_at WHERE account_id = :account_id AND quota_type = :quota_type"
+                ), {"reset_at": reset_at, "account_id": gemini_account_id, "quota_type": quota_type})
+        
+        monkeypatch.setattr(usage_buffer_module, "async_session_maker", session_maker)
+        buffer = _make_buffer(max_retries=0)
+        buffer.start()
+        # Before both windows, before the minute window only, and now
+        buffer.record(1, gemini_account_id, 4.0, timestamp=now - timedelta(days=2))
+        buffer.record(1, gemini_account_id, 3.0, timestamp=now - timedelta(minutes=5))
+        buffer.record(1, gemini_account_id, 2.0, timestamp=now)
+        await buffer.stop()
+        
+        async with db_engine.connect() as conn:
+            logged = (await conn.execute(text("SELECT SUM(amount) FROM usage_logs"))).scalar()
+            used = dict((await conn.execute(text(
+                "SELECT quota_type, used_quota FROM quotas WHERE account_id = :account_id"
+            ), {"account_id": gemini_account_id})).all())
+        
+        assert logged == 9.0
+        assert used == {"minute": 2.0, "daily": 5.0}
+    
+    asyncio.run(scenario())
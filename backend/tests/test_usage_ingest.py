@@ -0,0 +1,48 @@
+import asyncio
+
+from app.schemas.usage import UsageEvent
+from app.services.rate_limiter import rate_limiter
+from app.services.recommendation_engine import recommendation_engine
+from app.services.request_router import request_router
+from app.services.usage_ingest import usage_ingestor
+
+USER_ID = 1
+GEMINI_ACCOUNT_ID = 2  # 60 requests per minute
+
+
+def test_reported_usage_counts_against_rate_limits(session_maker, idle_usage_buffer):
+    async def scenario():
+        recommendation_engine.invalidate(USER_ID)
+        try:
+            async with session_maker() as db:
+                result = await usage_ingestor.ingest(db, USER_ID, [UsageEvent(account_id=GEMINI_ACCOUNT_ID, amount=60)])
+                assert result["accepted"] == 1
+                
+                routed = await request_router.route(db, USER_ID, 1.0, "gemini_free")
+                assert routed["status"] == "rate_limited"
+                assert 0 < routed["retry_after"] <= 60
+        finally:
+            rate_limiter.forget(GEMINI_ACCOUNT_ID)
+            recommendation_engine.invalidate(USER_ID)
+    
+    asyncio.run(scenario())
+
+
+def test_reporting_a_routed_call_under_its_reservation_id_is_a_duplicate(session_maker, idle_usage_buffer):
+    async def scenario():
+        recommendation_engine.invalidate(USER_ID)
+        try:
+            async with session_maker() as db:
+                routed = await request_router.route(db, USER_ID, 5.0, "gemini_free")
+                assert routed["status"] == "ok"
+                
+                event = UsageEvent(account_id=GEMINI_ACCOUNT_ID, amount=5, idempotency_key=routed["reservation_id"])
+                result = await usage_ingestor.ingest(db, USER_ID, [event])
+            
+            assert (result["accepted"], result["duplicates"]) == (0, 1)
+            assert idle_usage_buffer.queue.qsize() == 1
+        finally:
+            rate_limiter.forget(GEMINI_ACCOUNT_ID)
+            recommendation_engine.invalidate(USER_ID)
+    
+    asyncio.run(scenario())
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from sqlalchemy import text
+
+from app.models.user import User
+from app.routers import accounts as accounts_router
+from app.services.platform_verifier import platform_verifier
+
+
+def test_disconnected_verify_all_keeps_finished_checks(db_engine, session_maker, monkeypatch):
+    async def verify(account_id, platform_id, api_key):
+        # Account 1 answers at once, account 2 never before the client leaves
+        if account_id == 2:
+            await asyncio.sleep(60)
+        return {
+            "success": True,
+            "message": "Connection successful",
+            "details": {},
+            "definitive": True,
+            "account_id": account_id,
+            "cached": False
+        }
+    
+    monkeypatch.setattr(accounts_router, "async_session_maker", session_maker)
+    monkeypatch.setattr(platform_verifier, "verify", verify)
+    
+    async def scenario():
+        async with session_maker() as db:
+            user = await db.get(User, 1)
+            response = await accounts_router.verify_all_accounts(current_user=user, db=db)
+        
+        lines = []
+        first_line = asyncio.Event()
+        
+        async def client():
+            async for line in response.body_iterator:
+                lines.append(json.loads(line))
+                first_line.set()
+        
+        reader = asyncio.create_task(client())
+        await first_line.wait()
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+        
+        async with db_engine.connect() as conn:
+            verified = (await conn.execute(text(
+                "SELECT id FROM platform_accounts WHERE is_verified"
+            ))).scalars().all()
+            logged = (await conn.execute(text(
+                "SELECT account_id, action FROM usage_logs"
+            ))).all()
+        
+        assert [line["account_id"] for line in lines] == [1]
+        assert verified == [1]
+        assert logged == [(1, "account_verified")]
+    
+    asyncio.run(scenario())